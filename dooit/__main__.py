@@ -6,11 +6,20 @@ from dooit.ui.tui import Dooit
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("-v", "--version", help="Show version", action="store_true")
+    parser.add_argument(
+        "--diagnostics",
+        help="Show the yaml engine in use and benchmark it (takes a while)",
+        action="store_true",
+    )
     args = parser.parse_args()
 
     if args.version:
         ver = version("dooit")
         print(f"dooit - {ver}")
+    elif args.diagnostics:
+        from dooit.utils import diagnostics
+
+        diagnostics.run()
     else:
         Dooit().run()
 
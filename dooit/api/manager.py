@@ -1,11 +1,33 @@
+import gc
+from dataclasses import dataclass
+from threading import Lock
 from time import time
-from typing import Any, Dict, List, Optional
-from .model import Model
-from ..utils import Parser
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from .model import Model, get_generation, structure_changed
+from ..utils import get_storage
+from ..utils.schema import DEFERRED, get_version, wrap
+from ..utils.due_index import DueIndex
+from ..utils.tag_index import TagIndex
 from ..api.workspace import Workspace
 
 WORKSPACE = "workspace"
-parser = Parser()
+TODO = "todo"
+storage = get_storage()
+
+
+@dataclass
+class Change:
+    """
+    A change applied to the models while patching in reloaded data
+
+    `update` means the fields of `model` changed,
+    `children` means the children of `model` (of `child_kind`) were
+    added, removed or reordered
+    """
+
+    type: Literal["update", "children"]
+    model: Model
+    child_kind: Optional[str] = None
 
 
 class Manager(Model):
@@ -13,50 +35,175 @@ class Manager(Model):
     Manager top class that manages basically
     """
 
-    _lock = 0
     fields = []
     nomenclature: str = "Workspace"
     last_modified = 0
 
     def lock(self) -> None:
-        self._lock += 1
+        self._lock.acquire()
 
     def unlock(self) -> None:
-        self._lock -= 1
+        self._lock.release()
 
     def is_locked(self) -> bool:
-        return self._lock != 0
+        return self._lock.locked()
 
     def __init__(self, parent: Optional["Model"] = None) -> None:
         super().__init__(parent)
 
+        # Held while writing, saves coming in meanwhile leave their data
+        # in `_pending` for the one holding it, see `save`
+        self._lock = Lock()
+        self._pending_lock = Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+
+        # Every workspace and todo by uuid, see `get_by_uuid`
+        self._registry: Dict[str, Model] = {}
+        self._registry_generation = -1
+
+    def get_searchable(self) -> List[Model]:
+        return self.get_all_workspaces()
+
+    @property
+    def tag_index(self) -> TagIndex:
+        """
+        Todos by tag across all the workspaces
+
+        Todos of workspaces which were not loaded from storage yet are left out
+        """
+
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self.get_loaded_todos())
+
+        return self._tag_index
+
+    @property
+    def due_index(self) -> DueIndex:
+        """
+        Pending todos by due date across all the workspaces
+
+        Todos of workspaces which were not loaded from storage yet are left out
+        """
+
+        if self._due_index is None:
+            self._due_index = DueIndex(self.get_loaded_todos())
+
+        return self._due_index
+
+    def load_all(self) -> None:
+        """
+        Reads in the todos of the workspaces still waiting in storage
+        """
+
+        for i in self.workspaces:
+            i.load()
+
     def add_workspace(self) -> Workspace:
         return self.add_child("workspace")
 
-    def _get_commit_data(self):
-        return [child.commit() for child in self.workspaces]
+    def get_by_uuid(self, uuid: str) -> Optional[Model]:
+        """
+        Returns the workspace or todo with the given uuid, if any
+
+        Todos of workspaces which were not loaded from storage yet are left out
+        """
+
+        model = self._registry.get(uuid)
+        if model is not None and model.uuid == uuid and self.is_attached(model):
+            return model
+
+        if self._registry_generation != get_generation():
+            # Children were added or removed since, some might not be registered
+            self.build_registry()
+            return self._registry.get(uuid)
+
+    def is_attached(self, model: Model) -> bool:
+        """
+        Checks if the model is still part of the tree
+        """
+
+        while parent := model.parent:
+            index = parent._get_position(model.kind, model.uuid)
+            if index == -1 or parent._get_children(model.kind)[index] is not model:
+                return False
+
+            model = parent
+
+        return model is self
+
+    def build_registry(self) -> None:
+        registry: Dict[str, Model] = {}
+        stack: List[Model] = [self]
+        while stack:
+            model = stack.pop()
+
+            # Not through `todos` which would load deferred workspaces
+            todos = model._todos if isinstance(model, Workspace) else model.todos
+            for i in [*model.workspaces, *todos]:
+                registry[i.uuid] = i
+                stack.append(i)
+
+        self._registry = registry
+        self._registry_generation = get_generation()
+
+    def _register(self, model: Model) -> None:
+        self._registry[model.uuid] = model
+
+    def _get_commit_data(self) -> Dict[str, Any]:
+        return wrap([child.commit() for child in self.workspaces])
 
     def commit(self) -> None:
-        if self.is_locked():
-            return
+        self.save(self._get_commit_data())
+
+    def save(self, data: Dict[str, Any]) -> None:
+        """
+        Writes already collected commit data, safe to call from a worker thread
+
+        If another save is writing, the data is written by that one
+        once it is through instead
+        """
+
+        with self._pending_lock:
+            self._pending = data
+
+        # Checked again after releasing, data might have been left right before
+        while self._pending is not None and self._lock.acquire(blocking=False):
+            try:
+                with self._pending_lock:
+                    data, self._pending = self._pending, None
 
-        self.lock()
-        self.last_modified = time()
-        parser.save(self._get_commit_data())
-        self.unlock()
+                if data is not None:
+                    self.last_modified = time()
+                    storage.save(data)
+            finally:
+                self._lock.release()
 
     def setup(self, data: Optional[Dict] = None) -> None:
         if self.is_locked():
             return
 
-        data = data or parser.load()
+        data = data or storage.load()
         if not data:
             return
 
         self.workspaces.clear()
         self.todos.clear()
-        self.last_modified = parser.last_modified
-        self.from_data(data)
+        self._index = None
+        self._tag_index = None
+        self._due_index = None
+        self.last_modified = storage.last_modified
+
+        # Nothing is garbage while loading, collecting in between only slows it down
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.from_data(data)
+        finally:
+            if enabled:
+                gc.enable()
+
+        if storage.needs_commit:
+            self.commit()
 
     # WARNING: This will be deprecated in future versions
     def extract_data_old(self, data: Dict):
@@ -69,23 +216,149 @@ class Manager(Model):
         for i in data:
             child = self.add_child(WORKSPACE, len(self.workspaces))
             child.from_data(i)
+            if i.get(DEFERRED):
+                child.defer_todos(self.load_todos)
+
+    def load_todos(self, workspace: Workspace) -> None:
+        """
+        Loads the todos of a top-level workspace (and its children) from storage
+        """
+
+        todos = storage.load_todos(workspace.uuid)
+        for child in workspace.get_all_workspaces():
+            for i in todos.get(child.uuid, []):
+                todo = child.load_child(TODO)
+                todo.from_data(i)
+
+            child.count_children()
+
+            # Commit fragments without the todos are stale now
+            child.mark_dirty()
+
+        workspace.reindex()
+
+    def extract_data_packed(self, data: Tuple) -> None:
+        for i in data:
+            child = self.add_child(WORKSPACE, len(self.workspaces))
+            child.from_packed(i)
 
     def from_data(self, data: Any) -> None:
-        if isinstance(data, Dict):
+        if isinstance(data, tuple):
+            return self.extract_data_packed(data)
+
+        version = get_version(data)
+        if version == 1:
             self.extract_data_old(data)
-        else:
+        elif version == 2:
             self.extract_data_new(data)
+        else:
+            self.extract_data_new(data["workspaces"])
 
-    def refresh_data(self) -> bool:
-        if abs(self.last_modified - parser.last_modified) <= 2:
-            return False
+    def refresh_data(self) -> List[Change]:
+        """
+        Patches in the changes made to storage by someone else
+        """
 
-        if self.last_modified > parser.last_modified:
-            self.commit()
-            return False
+        if self.is_locked() or not storage.has_changed():
+            return []
+
+        data = storage.load()
+        if not data:
+            return []
+
+        self.last_modified = storage.last_modified
+        return self.patch(data)
+
+    def patch(self, data: Any) -> List[Change]:
+        """
+        Updates the models to match `data` in place, matching the items by uuid
+        Only the changed items are touched
+        """
+
+        loaded = Manager()
+        loaded.from_data(data)
+
+        changes: List[Change] = []
+        self._patch_children(self, loaded, WORKSPACE, changes)
+        self._recount(changes)
+        return changes
+
+    def _recount(self, changes: List[Change]) -> None:
+        """
+        Counts the todos again below the models affected by the changes
+        """
+
+        models = {
+            id(i): i
+            for i in (
+                j.model if j.type == "children" else j.model.parent for j in changes
+            )
+            if i is not None
+        }
+
+        def depth(model: Model) -> int:
+            level = 0
+            while model := model.parent:
+                level += 1
+
+            return level
+
+        # The deepest first, so that every model counts up to date children
+        for model in sorted(models.values(), key=depth, reverse=True):
+            model.recount()
+
+    def _patch_fields(self, model: Model, loaded: Model, changes: List[Change]):
+        items = [f"_{i}" for i in model.fields]
+        if [getattr(model, i).save() for i in items] == [
+            getattr(loaded, i).save() for i in items
+        ]:
+            return
+
+        # Taking over the loaded items avoids setters and their side effects
+        for i in items:
+            item = getattr(loaded, i)
+            item.model = model
+            setattr(model, i, item)
+
+        model.mark_dirty()
+        model.update_index()
+        model.resort()
+
+        changes.append(Change("update", model))
+
+    def _patch_children(
+        self, model: Model, loaded: Model, kind: str, changes: List[Change]
+    ):
+        if kind == TODO and isinstance(model, Workspace) and not model.is_loaded:
+            # Read fresh from storage once accessed
+            return
+
+        children = model._get_children(kind)
+        existing = {i.uuid: i for i in children}
+
+        patched = []
+        for child in loaded._get_children(kind):
+            if current := existing.get(child.uuid):
+                self._patch_fields(current, child, changes)
+                for i in ["workspace", "todo"]:
+                    self._patch_children(current, child, i, changes)
+            else:
+                child.parent = model
+                current = child
+                current.reindex()
+
+            patched.append(current)
+
+        if [i.uuid for i in patched] != list(existing):
+            for i in existing.keys() - {i.uuid for i in patched}:
+                existing[i].unindex()
 
-        self.setup()
-        return True
+            children[:] = patched
+            model._view = None
+            model._invalidate_positions(kind)
+            model.mark_dirty()
+            structure_changed()
+            changes.append(Change("children", model, kind))
 
 
 manager = Manager()
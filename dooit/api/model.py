@@ -1,8 +1,29 @@
-from typing import Any, ClassVar, Dict, List, Literal, Optional
+from bisect import bisect_left, insort
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
 from typing_extensions import Self
 from uuid import uuid4
 from dataclasses import dataclass
+from datetime import datetime
 from rich.text import Text
+from dooit.utils.due_index import DueIndex
+from dooit.utils.search_index import Matches, SearchIndex
+from dooit.utils.sorting import SortKey, SortedView, get_sort_order, parse_sort_keys
+from dooit.utils.tag_index import TagIndex
+
+if TYPE_CHECKING:
+    from dooit.api.workspace import Workspace
+    from dooit.api.todo import Todo
 
 SortMethodType = Literal["description", "status", "due", "urgency", "effort"]
 
@@ -51,12 +72,62 @@ Err = Result.Err
 Warn = Result.Warn
 
 
+@dataclass
+class Counts:
+    """
+    Aggregates over the todos below a model, kept up to date on every change
+    """
+
+    total: int = 0  # child todos
+    done: int = 0  # completed child todos
+    overdue: int = 0  # overdue child todos
+    descendants: int = 0  # todos in the whole subtree
+
+
+# Bumped whenever children are added or removed anywhere in the tree
+# Kept out of the classes, assigning class attributes slows down attribute lookups
+_generation = 0
+
+
+def get_generation() -> int:
+    return _generation
+
+
+def structure_changed() -> None:
+    global _generation
+    _generation += 1
+
+
 class Model:
     """
     Model class to for the base tree structure
     """
 
     class_kind: ClassVar[str]
+    _kinds: ClassVar[Dict[str, Type["Model"]]] = {}
+
+    # Positions of the children by uuid, per kind, created on first lookup
+    # Only the first `_valid[kind]` children are known to be indexed,
+    # `_removed[kind]` holds the indexed positions of the children removed since
+    _positions: Optional[Dict[str, Dict[str, int]]] = None
+    _valid: Dict[str, int]
+    _removed: Dict[str, List[int]]
+
+    # Created on first use, most todos have no children
+    _counts: Optional[Counts] = None
+
+    # Index of the descriptions searched from this model, built on first search
+    _index: Optional[SearchIndex] = None
+
+    # Todos by tag across the whole tree, built by the manager on first use
+    _tag_index: Optional[TagIndex] = None
+
+    # Pending todos by due date across the whole tree, built like the tags
+    _due_index: Optional[DueIndex] = None
+
+    # Child todos in the order of the sort mode, built on first use
+    _view: Optional[SortedView] = None
+
     fields: List
     sortable_fields: List[SortMethodType]
 
@@ -64,23 +135,35 @@ class Model:
         self,
         parent: Optional["Model"] = None,
     ) -> None:
-        from dooit.api.workspace import Workspace
-        from dooit.api.todo import Todo
-
-        self._uuid = f"{self.kind}_{uuid4()}"
+        self._uuid: Optional[str] = None
         self.parent = parent
 
-        self.workspaces: List[Workspace] = []
-        self.todos: List[Todo] = []
+        self.workspaces: List["Workspace"] = []
+        self.todos: List["Todo"] = []
+
+        # Clean models reuse their last commit fragment
+        self._dirty = True
+        self._commit_cache: Any = None
 
     @property
     def uuid(self) -> str:
+        # Generated lazily, loaded models get theirs from the data
+        if self._uuid is None:
+            self._uuid = f"{self.kind}_{uuid4()}"
+
         return self._uuid
 
     @property
     def kind(self):
         return self.class_kind
 
+    @property
+    def counts(self) -> Counts:
+        if self._counts is None:
+            self._counts = Counts()
+
+        return self._counts
+
     @property
     def nest_level(self):
         level = 0
@@ -129,12 +212,172 @@ class Model:
         """
 
         key, value = list(kwargs.items())[0]
+        if key == "uuid":
+            return self._get_position(kind, value)
+
         for i, j in enumerate(self._get_children(kind)):
             if getattr(j, key) == value:
                 return i
 
         return -1
 
+    def _get_position(self, kind: str, uuid: str) -> int:
+        """
+        Get child index by uuid, -1 if there is no such child
+
+        The position map is checked against the children on every lookup
+        and only re-indexed from where it went out of date
+        """
+
+        children = self._get_children(kind)
+        if self._positions is None:
+            self._positions = {}
+            self._valid = {}
+            self._removed = {}
+
+        positions = self._positions.setdefault(kind, {})
+        removed = self._removed.setdefault(kind, [])
+
+        index = positions.get(uuid)
+        if index is not None:
+            # Every removed child before it moved it one place up
+            index -= bisect_left(removed, index)
+            if index < len(children) and children[index].uuid == uuid:
+                return index
+
+        # Index the rest first, then everything in case the children were changed
+        # directly instead of through the methods below
+        valid = self._flush_removed(kind)
+        for start in [valid, 0] if valid else [0]:
+            self._index_children(kind, start)
+            index = positions.get(uuid, -1)
+            if -1 < index < len(children) and children[index].uuid == uuid:
+                return index
+
+        positions.pop(uuid, None)
+        return -1
+
+    def _index_children(self, kind: str, start: int = 0) -> None:
+        assert self._positions is not None
+
+        children = self._get_children(kind)
+        positions = self._positions[kind]
+        if not start:
+            positions.clear()
+
+        uuids = [i._uuid or i.uuid for i in children[start:]]
+        positions.update(zip(uuids, range(start, len(children))))
+        self._valid[kind] = len(children)
+
+    def _flush_removed(self, kind: str) -> int:
+        """
+        Drops the pending removals by marking the positions after the first one
+        as out of date, returns the number of children still indexed
+        """
+
+        if removed := self._removed[kind]:
+            self._valid[kind] = min(self._valid.get(kind, 0), removed[0])
+            removed.clear()
+
+        return self._valid.get(kind, 0)
+
+    def _invalidate_positions(self, kind: str, start: int = 0) -> None:
+        """
+        Marks the positions of the children from `start` onwards as out of date
+        """
+
+        if self._positions is not None and kind in self._valid:
+            self._flush_removed(kind)
+            self._valid[kind] = min(self._valid[kind], start)
+
+    def _forget_position(self, kind: str, uuid: str) -> None:
+        """
+        Keeps the positions of the later children usable after a removal
+        """
+
+        if self._positions is not None and uuid in self._positions.get(kind, {}):
+            insort(self._removed[kind], self._positions[kind].pop(uuid))
+
+    def _swap_children(self, kind: str, index: int, other: int) -> None:
+        arr = self._get_children(kind)
+        arr[index], arr[other] = arr[other], arr[index]
+
+        if self._positions is not None and kind in self._valid:
+            if max(index, other) < self._flush_removed(kind):
+                positions = self._positions[kind]
+                positions[arr[index].uuid] = index
+                positions[arr[other].uuid] = other
+            else:
+                self._invalidate_positions(kind, min(index, other))
+
+        self.mark_dirty()
+
+    def count_children(self) -> None:
+        """
+        Counts the child todos from scratch, used once they are loaded
+        """
+
+        todos = self.todos
+        if not todos and self._counts is None:
+            return
+
+        # Todos turn overdue without being touched, their flags might be stale
+        now = datetime.now()
+        for i in todos:
+            i._status.derive(now)
+
+        counts = self.counts
+        counts.total = len(todos)
+        counts.done = counts.overdue = 0
+        counts.descendants = counts.total
+        for i in todos:
+            counts.done += not i._status.pending
+            counts.overdue += i._status.overdue
+            if i._counts is not None:
+                counts.descendants += i._counts.descendants
+
+    def recount(self) -> None:
+        """
+        Counts the child todos from scratch and passes the change on to the ancestors
+        """
+
+        descendants = self.counts.descendants
+        self.count_children()
+        if self.parent and self.kind == "todo":
+            self.parent.add_descendants(self.counts.descendants - descendants)
+
+    def add_descendants(self, count: int) -> None:
+        model = self
+        while model is not None:
+            model.counts.descendants += count
+            if model.kind != "todo":
+                break
+
+            model = model.parent
+
+    def _child_added(self, child: "Model") -> None:
+        if child.kind != "todo":
+            return
+
+        counts = self.counts
+        counts.total += 1
+        counts.done += not child._status.pending
+        counts.overdue += child._status.overdue
+        self.add_descendants(1 + child.counts.descendants)
+
+        # Passes a change of the overdue flag on to the counts
+        child._status.derive()
+
+    def _child_removed(self, child: "Model") -> None:
+        if child.kind != "todo":
+            return
+
+        counts = self.counts
+        counts.total -= 1
+        counts.done -= not child._status.pending
+        counts.overdue -= child._status.overdue
+        self.add_descendants(-1 - child.counts.descendants)
+
     def _get_index(self) -> int:
         """
         Get items's index among it's siblings
@@ -143,7 +386,26 @@ class Model:
         if not self.parent:
             return -1
 
-        return self.parent._get_child_index(self.kind, uuid=self._uuid)
+        return self.parent._get_position(self.kind, self.uuid)
+
+    def mark_dirty(self) -> None:
+        """
+        Mark the item and its ancestors to be committed again
+        """
+
+        model = self
+        while model:
+            model._dirty = True
+            model = model.parent
+
+    def mark_clean(self, fragment: Any) -> Any:
+        """
+        Cache the commit fragment till the item changes
+        """
+
+        self._dirty = False
+        self._commit_cache = fragment
+        return fragment
 
     def edit(self, key: str, value: str) -> Result:
         """
@@ -152,7 +414,10 @@ class Model:
 
         var = f"_{key}"
         if hasattr(self, var):
-            return getattr(self, var).set(value)
+            self.mark_dirty()
+            res = getattr(self, var).set(value)
+            self.resort()
+            return res
         else:
             return Err("Invalid Request!")
 
@@ -168,8 +433,8 @@ class Model:
 
         if not self.parent:
             return
-        arr = self.parent._get_children(self.kind)
-        arr[idx], arr[idx - 1] = arr[idx - 1], arr[idx]
+
+        self.parent._swap_children(self.kind, idx, idx - 1)
 
     def shift_down(self) -> bool:
         """
@@ -185,7 +450,7 @@ class Model:
         if idx == len(arr) - 1:
             return False
 
-        arr[idx], arr[idx + 1] = arr[idx + 1], arr[idx]
+        self.parent._swap_children(self.kind, idx, idx + 1)
         return True
 
     def prev_sibling(self) -> Optional[Self]:
@@ -196,9 +461,9 @@ class Model:
         if not self.parent:
             return
 
-        idx = self.parent._get_child_index(self.kind, uuid=self._uuid)
+        idx = self._get_index()
 
-        if idx:
+        if idx > 0:
             return self.parent._get_children(self.kind)[idx - 1]
 
     def next_sibling(self) -> Optional[Self]:
@@ -209,10 +474,10 @@ class Model:
         if not self.parent:
             return
 
-        idx = self.parent._get_child_index(self.kind, uuid=self._uuid)
+        idx = self._get_index()
         arr = self.parent._get_children(self.kind)
 
-        if idx < len(arr) - 1:
+        if idx != -1 and idx < len(arr) - 1:
             return arr[idx + 1]
 
     def add_sibling(self, inherit: bool = False) -> Self:
@@ -244,7 +509,30 @@ class Model:
 
         children = self._get_children(kind)
         children.insert(index, child)
+        self._invalidate_positions(kind, index)
+        self._child_added(child)
+        self.mark_dirty()
+
+        if kind == "todo" and self._view:
+            self._view.insert(child)
+            self.view_changed()
+
+        if search_index := child.get_search_index():
+            search_index.add(child)
 
+        structure_changed()
+        self.get_root()._register(child)
+        return child
+
+    def load_child(self, kind: str) -> Any:
+        """
+        Appends a new child while loading data into this model
+        Unlike `add_child`, the ancestors are not marked dirty
+        """
+
+        child = self._kinds[kind](parent=self)
+        self._get_children(kind).append(child)
+        structure_changed()
         return child
 
     def remove_child(self, kind: str, uuid: str) -> Any:
@@ -252,9 +540,18 @@ class Model:
         Remove the child based on attr
         """
 
-        idx = self._get_child_index(kind, uuid=uuid)
+        idx = self._get_position(kind, uuid)
         if idx != -1:
-            return self._get_children(kind).pop(idx)
+            self.mark_dirty()
+            self._forget_position(kind, uuid)
+            structure_changed()
+
+            child = self._get_children(kind).pop(idx)
+            self._child_removed(child)
+            if kind == "todo" and self._view:
+                self._view.remove(child)
+            child.unindex()
+            return child
 
     def drop(self) -> None:
         """
@@ -262,16 +559,90 @@ class Model:
         """
 
         if self.parent:
-            self.parent.remove_child(self.kind, self._uuid)
+            self.parent.remove_child(self.kind, self.uuid)
 
-    def sort(self, attr: str) -> None:
+    def sort(
+        self, keys: Union[str, Sequence[SortKey]], recursive: bool = False
+    ) -> None:
         """
-        Sort the children based on specific attr
+        Sort this model along with its siblings by one or more fields,
+        either as a list of `(field, descending)` or written like `urgency,-due`
         """
 
         if self.parent:
-            children = self.parent._get_children(self.kind)
-            children.sort(key=lambda x: getattr(x, f"_{attr}").get_sortable())
+            self.parent.sort_children(self.kind, keys, recursive)
+
+    def sort_children(
+        self, kind: str, keys: Union[str, Sequence[SortKey]], recursive: bool = False
+    ) -> None:
+        """
+        Sort the children of a kind, with `recursive` the children of
+        all the descendants of that kind as well
+        """
+
+        if isinstance(keys, str):
+            keys = parse_sort_keys(keys)
+
+        now = datetime.now()
+        stack = [self]
+        while stack:
+            model = stack.pop()
+            children = model._get_children(kind)
+            order = get_sort_order(children, keys, now)
+            if order != list(range(len(order))):
+                children[:] = [children[i] for i in order]
+                model._invalidate_positions(kind)
+                model.mark_dirty()
+
+            if recursive:
+                stack.extend(children)
+
+    def get_sort_keys(self) -> List[SortKey]:
+        """
+        Returns the sort mode the child todos are kept in, empty for manual order
+        """
+
+        return []
+
+    def get_view(self, kind: str) -> List:
+        """
+        Returns the children of a kind in the order they are shown, the child
+        todos sorted by the sort mode if there is one. The children themselves
+        keep the manual order
+        """
+
+        children = self._get_children(kind)
+        keys = self.get_sort_keys() if kind == "todo" else []
+        if not keys:
+            self._view = None
+            return children
+
+        view = self._view
+        if view is None or view.sort_keys != keys or len(view.models) != len(children):
+            view = self._view = SortedView(children, keys)
+
+        return view.models
+
+    def resort(self) -> None:
+        """
+        Moves this model to its place among its siblings in the sort mode,
+        after the fields it is sorted by changed
+        """
+
+        parent = self.parent
+        if parent and parent._view and parent._view.update(self):
+            parent.view_changed()
+
+    def view_changed(self) -> None:
+        """
+        Marks the shown order of the child todos as changed, for the tree to catch up
+        """
+
+        workspace = self
+        while workspace.kind == "todo":
+            workspace = workspace.parent
+
+        workspace._resorted[self.uuid] = self
 
     def commit(self) -> Dict[str, Any]:
         """
@@ -289,6 +660,92 @@ class Model:
     def from_data(self, data: Dict[str, Any]) -> None:
         raise NotImplementedError
 
+    def get_search_index(self) -> Optional[SearchIndex]:
+        """
+        Returns the index holding this model's description, if it was built yet
+        """
+
+    def get_searchable(self) -> List["Model"]:
+        """
+        Models searched from this one
+        """
+
+        return []
+
+    def get_searchable_tree(self) -> List["Model"]:
+        """
+        This model and its descendants which are searched along with it
+        """
+
+        return [self]
+
+    def search(self, query: str, limit: Optional[int] = None) -> Matches:
+        """
+        Returns the best `limit` searchable models matching all the words
+        """
+
+        if self._index is None:
+            self._index = SearchIndex(self.get_searchable())
+
+        return self._index.search(query, limit)
+
+    def get_todo_indexes(self) -> List[Any]:
+        """
+        Returns the indexes of the todos across the tree which were built yet
+        """
+
+        root = self.get_root()
+        return [i for i in (root._tag_index, root._due_index) if i]
+
+    def update_index(self) -> None:
+        """
+        Updates the indexes after the description or due date changed
+        """
+
+        if search_index := self.get_search_index():
+            search_index.update(self)
+
+    def reindex(self) -> None:
+        """
+        Puts this model and its descendants in the indexes,
+        used when a loaded subtree joins the tree
+        """
+
+        if search_index := self.get_search_index():
+            for i in self.get_searchable_tree():
+                search_index.add(i)
+
+        if indexes := self.get_todo_indexes():
+            for i in self.get_loaded_todos():
+                for index in indexes:
+                    index.add(i)
+
+    def unindex(self) -> None:
+        """
+        Takes this model and its descendants out of the indexes
+        """
+
+        if search_index := self.get_search_index():
+            for i in self.get_searchable_tree():
+                search_index.discard(i)
+
+        if indexes := self.get_todo_indexes():
+            for i in self.get_loaded_todos():
+                for index in indexes:
+                    index.discard(i)
+
+    def get_root(self) -> "Model":
+        model = self
+        while model.parent:
+            model = model.parent
+
+        return model
+
+    def _register(self, model: "Model") -> None:
+        """
+        Called on the root with every child added through `add_child`
+        """
+
     def get_all_workspaces(self) -> List:
         from dooit.api.workspace import Workspace
 
@@ -307,8 +764,28 @@ class Model:
 
         return arr
 
+    def get_loaded_todos(self) -> List:
+        """
+        Like `get_all_todos`, but through the child workspaces as well
+        and leaving out the todos still waiting in storage
+        """
+
+        arr = []
+        for i in self.workspaces:
+            arr.extend(i.get_loaded_todos())
+
+        stack = self.todos[::-1]
+        while stack:
+            todo = stack.pop()
+            arr.append(todo)
+            if todo.todos:
+                stack.extend(todo.todos[::-1])
+
+        return arr
+
     def __init_subclass__(cls) -> None:
         cls.class_kind = cls.__name__.lower()
+        Model._kinds[cls.class_kind] = cls
 
 
 Model.__init_subclass__()
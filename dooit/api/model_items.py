@@ -1,10 +1,12 @@
 import re
 from os import environ
-from typing import Any, Tuple
+from math import inf
+from typing import Any, List, Optional, Tuple, get_args
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from dooit.utils.date_parser import parse
-from .model import Result, Ok, Warn, Err
+from dooit.utils.sorting import SortKey, format_sort_keys, parse_sort_keys
+from dooit.utils.transitions import transitions
+from .model import Result, Ok, Warn, Err, SortMethodType
 
 DATE_ORDER = environ.get("DOOIT_DATE_ORDER", "DMY")
 DATE_FORMAT = (
@@ -41,7 +43,10 @@ class Item:
 
     def __init__(self, model: Any) -> None:
         self.model = model
-        self.model_kind = model.__class__.__name__.lower()
+
+    @property
+    def model_kind(self) -> str:
+        return self.model.__class__.__name__.lower()
 
     def set(self, val: str) -> Result:
         """
@@ -49,9 +54,9 @@ class Item:
         """
         raise NotImplementedError
 
-    def get_sortable(self) -> Any:
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
         """
-        Returns a value for item for sorting
+        Returns a value for item for sorting, as of `now`
         """
         raise NotImplementedError
 
@@ -77,80 +82,172 @@ class Item:
 class Status(Item):
     pending = True
 
+    # As of the last time the status was derived, counted by the parent
+    overdue = False
+
+    # The value is cached along with what it was derived from,
+    # `expires` is the timestamp at which it changes by itself
+    _cached: Optional[str] = None
+    _cached_for: Tuple = ()
+    expires = inf
+
     @property
     def value(self):
+        model = self.model
+        key = (self.pending, model._due._value, model._recurrence.value)
+        if self._cached is None or key != self._cached_for:
+            self.refresh()
+
+        return self._cached
+
+    def refresh(self) -> None:
+        """
+        Derives the status again, along with the moment it changes next
+        """
+
         self.handle_recurrence()
+        self.derive()
+
+    def derive(self, now: Optional[datetime] = None) -> None:
+        """
+        Like `refresh` but leaves recurrences alone, used while counting
+        the statuses of the children as they are loaded
+        """
+
+        model = self.model
+        expires = self.expires
+        value, self.expires = self.get_value(now)
+        self._cached = value
+        self._cached_for = (self.pending, model._due._value, model._recurrence.value)
+        self.set_overdue(value == "OVERDUE")
+        if self.expires != expires:
+            transitions.push(self.expires, self)
+
+    def get_value(self, now: Optional[datetime] = None) -> Tuple[str, float]:
+        """
+        Returns the status as of `now` along with the timestamp at which it changes
+        """
 
         if not self.pending:
-            return "COMPLETED"
+            return "COMPLETED", self.model._recurrence.next_rollover()
 
         due = self.model._due._value
         if not due or due == "none":  # why? dateparser slowpok
-            return "PENDING"
+            return "PENDING", inf
 
+        now = now or datetime.now()
         if due.hour or due.minute:
-            now = datetime.now()
             if due < now:
-                return "OVERDUE"
+                return "OVERDUE", inf
+
+            return "PENDING", due.timestamp()
         else:
-            today = datetime.today().date()
-            due = due.date()
-            if today > due:
-                return "OVERDUE"
+            if now.date() > due.date():
+                return "OVERDUE", inf
+
+            # Overdue from the day after
+            return "PENDING", (due + timedelta(days=1)).timestamp()
+
+    def set_overdue(self, overdue: bool) -> None:
+        if self.overdue != overdue:
+            self.overdue = overdue
+            if parent := self.model.parent:
+                parent.counts.overdue += 1 if overdue else -1
+
+            self.model.resort()
 
-        return "PENDING"
+    def setup(self, value: str) -> None:
+        # Stored statuses are already consistent, parents are
+        # settled once their children are loaded (see `Todo.from_data`)
+        self.set_pending(value != "COMPLETED")
+
+    def set_pending(self, pending: bool) -> None:
+        if self.pending != pending:
+            self.pending = pending
+            model = self.model
+            model.mark_dirty()
+            if parent := model.parent:
+                parent.counts.done += -1 if pending else 1
+
+            # Only pending todos are on the agenda
+            if model._due._value and (due_index := model.get_root()._due_index):
+                due_index.add(model)
+
+            model.resort()
 
     def toggle_done(self) -> bool:
-        self.pending = not self.pending
+        self.set_pending(not self.pending)
         self.update_others()
-        return not self.pending
 
-    def handle_recurrence(self):
-        if not self.model.recurrence:
-            return
+        completed = not self.pending
+        self.handle_recurrence()
+        return completed
+
+    def handle_recurrence(self) -> None:
+        """
+        Brings a completed recurring todo back, due at the latest occurrence
+        that has come by now. The ones in between are counted as skipped
+        """
 
         if self.pending:
             return
 
-        due = self.model._due._value
-        if not due or due == "none":
+        model = self.model
+        due = model._due._value
+        recurrence = model._recurrence
+        if not (due and recurrence.value):
             return
 
-        sign, frequency = split_duration(self.model._recurrence.value)
-        frequency = int(frequency)
-        time_to_add = timedelta(**{f"{DURATION_LEGEND[sign]}s": frequency})
-        new_time = due + time_to_add
-
-        if new_time >= datetime.now():
+        period = recurrence.period()
+        occurrences = (datetime.now() - due) // period
+        if occurrences < 1:
             return
 
-        self.model.edit("due", new_time.strftime(DATE_FORMAT))
-        self.pending = True
+        model._due._value = due + occurrences * period
+        recurrence.skipped = occurrences - 1
+        self.set_pending(True)
+        self.update_parents()
 
     def set(self, val: Any) -> Result:
-        self.pending = val != "COMPLETED"
+        self.set_pending(val != "COMPLETED")
         self.update_others()
         return Ok()
 
+    def save(self) -> str:
+        # Overdue is derived from the due date, only completion needs storing
+        return "PENDING" if self.pending else "COMPLETED"
+
     def update_others(self):
-        # Update ancestors
+        self.update_parents()
+        self.update_children()
+
+    def update_parents(self):
+        """
+        Completes the ancestors whose children are all completed and vice versa
+        """
+
         current = self.model
-        while parent := current.parent:
-            if hasattr(parent, "status"):
-                if parent.todos:
-                    is_done = all(i.status == "COMPLETED" for i in parent.todos)
-                    parent._status.pending = not is_done
-                current = parent
-            else:
+        while (parent := current.parent) and parent.kind == "todo":
+            counts = parent.counts
+            pending = counts.done < counts.total
+            if parent._status.pending == pending:
+                # The ones further up can't change either
                 break
 
-        # Update children
-        def update_children(todo=self.model, status=self.pending):
-            todo._status.pending = status
+            parent._status.set_pending(pending)
+            current = parent
+
+    def update_children(self):
+        """
+        Gives all the descendants the same completion as this todo
+        """
+
+        def update(todo=self.model, status=self.pending):
+            todo._status.set_pending(status)
             for i in todo.todos:
-                update_children(i, status)
+                update(i, status)
 
-        update_children()
+        update()
 
     def to_txt(self) -> str:
         return "X" if self.value == "COMPLETED" else "O"
@@ -162,10 +259,12 @@ class Status(Item):
         else:
             self.set("PENDING")
 
-    def get_sortable(self) -> Any:
-        if self.value == "OVERDUE":
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
+        # Worked out from scratch, reading `value` might refresh every status
+        status = self.get_value(now)[0]
+        if status == "OVERDUE":
             return 1
-        elif self.value == "PENDING":
+        elif status == "PENDING":
             return 2
         else:
             return 3
@@ -186,10 +285,16 @@ class Description(Item):
         value = self.clean(value)
         if value and value != self._default:
             self.value = value
+            self.model.update_index()
+
             return Ok()
 
         return Err("Can't leave description empty!")
 
+    def setup(self, value: str) -> None:
+        if value := self.clean(value):
+            self.value = value
+
     def to_txt(self) -> str:
         return self.value
 
@@ -206,7 +311,7 @@ class Description(Item):
 
         self.value = value.strip()
 
-    def get_sortable(self) -> Any:
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
         return self.value
 
 
@@ -229,17 +334,15 @@ class Due(Item):
 
         if not val or val == "none":
             self._value = None
+            self.model.update_index()
             return Ok("Due removed for the todo")
 
         try:
+            # Dates without a year are moved to the next one to come by the parser
             res, ok = parse(val)
-            current_year = str(datetime.now().year)
-
             if ok and res:
-                if res < datetime.today() and current_year not in val:
-                    res = res + relativedelta(years=1)
-
                 self._value = res
+                self.model.update_index()
                 return Ok(f"Due date changed to [b cyan]{self.value}[/b cyan]")
             else:
                 return Warn("Cannot parse the string!")
@@ -251,10 +354,11 @@ class Due(Item):
         if not self._value:
             return super().save()
 
-        return str(self._value.timestamp())
+        # Stored with a precision of seconds
+        return str(int(self._value.timestamp()))
 
     def setup(self, value: str) -> None:
-        if value:
+        if value and value != "none":
             try:
                 self._value = datetime.fromtimestamp(float(value))
             except ValueError:
@@ -279,7 +383,7 @@ class Due(Item):
             else:
                 self._value = datetime.strptime(value, DATE_FORMAT)
 
-    def get_sortable(self) -> Any:
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
         return self._value or datetime.max
 
 
@@ -302,19 +406,26 @@ class Urgency(Item):
         self.value = val
         return Ok()
 
+    def setup(self, value: str) -> None:
+        if 1 <= (value := int(value)) <= 4:
+            self.value = value
+
     def to_txt(self) -> str:
         return f"({self.value})"
 
     def from_txt(self, txt: str) -> None:
         self.set(txt.split()[1][1])
 
-    def get_sortable(self) -> Any:
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
         return -self.value
 
 
 class Recurrence(Item):
     value = ""
 
+    # Occurrences passed over by the last catch-up, see `Status.handle_recurrence`
+    skipped = 0
+
     def set(self, val: str) -> Result:
         if not val:
             self.value = ""
@@ -335,6 +446,11 @@ class Recurrence(Item):
 
         return Ok(f"Recurrence set for {self.value}")
 
+    def setup(self, value: str) -> None:
+        # Loaded as stored, the due date is only filled in when editing
+        if value and split_duration(value):
+            self.value = value
+
     def to_txt(self) -> str:
         if self.value:
             return f"%{self.value}"
@@ -347,12 +463,26 @@ class Recurrence(Item):
                 self.value = i[1:]
                 break
 
-    def get_sortable(self) -> Any:
+    def period(self) -> timedelta:
+        frequency, value = split_duration(self.value)
+        return timedelta(**{DURATION_LEGEND[frequency] + "s": int(value)})
+
+    def next_rollover(self) -> float:
+        """
+        Timestamp at which a completed todo is due again, inf if it doesn't recur
+        """
+
+        due = self.model._due._value
+        if not (self.value and due):
+            return inf
+
+        return (due + self.period()).timestamp()
+
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
         if not self.value:
             return timedelta.max
         else:
-            frequency, value = split_duration(self.value)
-            return timedelta(**{DURATION_LEGEND[frequency] + "s": int(value)})
+            return self.period()
 
 
 class Effort(Item):
@@ -380,7 +510,11 @@ class Effort(Item):
 
         return Warn("Cannot decrease effort below zero")
 
-    def get_sortable(self) -> Any:
+    def setup(self, value: str) -> None:
+        if value:
+            self.set(value)
+
+    def get_sortable(self, now: Optional[datetime] = None) -> Any:
         if self._value:
             return self._value
         else:
@@ -398,3 +532,26 @@ class Effort(Item):
         for i in txt.split()[3:]:
             if i[0] == "+":
                 self.set(i[1:])
+
+
+class SortMode(Item):
+    """
+    Fields the todos of a workspace are kept sorted by, written like `urgency,-due`
+    """
+
+    value = ""
+    keys: List[SortKey] = []
+
+    def set(self, val: str) -> Result:
+        keys = parse_sort_keys(val)
+        for field, _ in keys:
+            if field not in get_args(SortMethodType):
+                return Warn(f"Cannot sort by {field}!")
+
+        self.value = format_sort_keys(keys)
+        self.keys = keys
+        return Ok()
+
+    def setup(self, value: str) -> None:
+        if value:
+            self.set(value)
@@ -1,6 +1,20 @@
 from datetime import datetime
-from typing import Any, List, Optional, Union, Dict
+from typing import Any, List, Optional, Tuple, Union, Dict
 from .model import Model, Result
+from ..utils.search_index import SearchIndex
+from ..utils.sorting import SortKey
+from ..utils.tag_index import get_tags
+from .model_items import Status, Due, Urgency, Recurrence, Description, Effort
+from ..utils.schema import (
+    DESCRIPTION,
+    DUE,
+    EFFORT,
+    RECURRENCE,
+    STATUS,
+    TODOS,
+    URGENCY,
+    UUID,
+)
 
 
 TODO = "todo"
@@ -18,6 +32,10 @@ def reversed_dict(d):
 class Todo(Model):
     fields = ["description", "due", "urgency", "effort", "status", "recurrence"]
 
+    # Tags of the description they were last picked from
+    _tags: Tuple[str, ...] = ()
+    _tags_of = ""
+
     sortable_fields = [
         "description",
         "due",
@@ -27,15 +45,6 @@ class Todo(Model):
     ]
 
     def __init__(self, parent: Optional[Model] = None) -> None:
-        from .model_items import (
-            Status,
-            Due,
-            Urgency,
-            Recurrence,
-            Description,
-            Effort,
-        )
-
         super().__init__(parent)
         self._status = Status(self)
         self._description = Description(self)
@@ -71,7 +80,15 @@ class Todo(Model):
 
     @property
     def tags(self) -> List[str]:
-        return [i for i in self.description.split() if i[0] == "@"]
+        description = self.description
+        if "@" not in description:
+            return []
+
+        if description is not self._tags_of:
+            self._tags = get_tags(description)
+            self._tags_of = description
+
+        return list(self._tags)
 
     def add_child(
         self, kind: str = "todo", index: int = 0, inherit: bool = False
@@ -81,40 +98,76 @@ class Todo(Model):
 
         return super().add_child(kind, index, inherit)
 
+    def get_search_index(self) -> Optional[SearchIndex]:
+        workspace = self.parent
+        while workspace and workspace.kind == TODO:
+            workspace = workspace.parent
+
+        if workspace:
+            return workspace._index
+
+    def get_searchable_tree(self) -> List[Model]:
+        return self.get_all_todos()
+
+    def get_loaded_todos(self) -> List["Todo"]:
+        return [self, *super().get_loaded_todos()]
+
+    def get_sort_keys(self) -> List[SortKey]:
+        # Kept in the sort mode of the workspace all the way down
+        return self.parent.get_sort_keys() if self.parent else []
+
+    def update_index(self) -> None:
+        super().update_index()
+        for index in self.get_todo_indexes():
+            index.add(self)
+
     def add_todo(self, index: int = 0, inherit: bool = False):
         return self.add_child(TODO, index, inherit)
 
     def edit(self, key: str, value: str) -> Result:
         res = super().edit(key, value)
-        self._status.update_others()
+        if key != "status":
+            # Status edits update the others by themselves
+            self._status.update_parents()
+
         return res
 
     def toggle_complete(self) -> bool:
         return self._status.toggle_done()
 
     def set_urgency(self, value: int) -> None:
+        self.mark_dirty()
         self._urgency.set(value)
+        self.resort()
 
     def decrease_urgency(self) -> None:
+        self.mark_dirty()
         self._urgency.decrease()
+        self.resort()
 
     def increase_urgency(self) -> None:
+        self.mark_dirty()
         self._urgency.increase()
+        self.resort()
 
-    def to_data(self) -> Dict[str, str]:
+    def to_data(self) -> Dict[str, Any]:
         """
-        Return storable form of todo
+        Return storable form of todo, fields with default values are left out
         """
 
-        return {
-            "uuid": self._uuid,
-            "status": self._status.save(),
-            "urgency": self._urgency.save(),
-            "description": self._description.save(),
-            "due": self._due.save(),
-            "effort": self._effort.save(),
-            "recurrence": self._recurrence.save(),
-        }
+        data: Dict[str, Any] = {UUID: self.uuid, DESCRIPTION: self.description}
+        if not self._status.pending:
+            data[STATUS] = 1
+        if self._urgency.value != 1:
+            data[URGENCY] = self._urgency.value
+        if due := self._due._value:
+            data[DUE] = int(due.timestamp())
+        if effort := self._effort._value:
+            data[EFFORT] = int(effort)
+        if recurrence := self._recurrence.value:
+            data[RECURRENCE] = recurrence
+
+        return data
 
     def fill_from_data(
         self, data: Union[Dict, str], overwrite_uuid: bool = True
@@ -133,42 +186,116 @@ class Todo(Model):
         self._recurrence.from_txt(data)
         self._effort.from_txt(data)
 
-    def extract_data_new(self, data: Dict[str, str], overwrite_uuid: bool = True):
-        def get(key: str) -> str:
-            return data.get(key, "")
+    def extract_data_new(self, data: Dict[str, Any], overwrite_uuid: bool = True):
+        get = data.get
+
+        if UUID not in data:
+            # Version 2, every field written out with long keys
+            if overwrite_uuid:
+                self._uuid = get("uuid", "")
+
+            self._status.setup(get("status", ""))
+            self._urgency.setup(get("urgency", ""))
+            self._due.setup(get("due", ""))
+            self._description.setup(get("description", ""))
+            self._recurrence.setup(get("recurrence", ""))
+            self._effort.setup(get("effort", ""))
+            return
 
         if overwrite_uuid:
-            self._uuid = get("uuid")
+            self._uuid = data[UUID]
+
+        self.setup_fields(
+            get(STATUS),
+            get(URGENCY),
+            get(DESCRIPTION),
+            get(DUE),
+            get(EFFORT),
+            get(RECURRENCE),
+        )
 
-        self._status.setup(get("status"))
-        self._urgency.setup(get("urgency"))
-        self._due.setup(get("due"))
-        self._description.setup(get("description"))
-        self._recurrence.setup(get("recurrence"))
-        self._effort.setup(get("effort"))
+    def setup_fields(
+        self,
+        status: Optional[int],
+        urgency: Optional[int],
+        description: Optional[str],
+        due: Optional[int],
+        effort: Optional[int],
+        recurrence: Optional[str],
+    ) -> None:
+        """
+        Sets up the fields from their compact form, None means the default
+        """
+
+        self._status.setup("COMPLETED" if status else "PENDING")
+        self._urgency.setup(urgency or 1)
+        self._due.setup(due or "")
+        self._description.setup(description or "")
+        self._recurrence.setup(recurrence or "")
+        self._effort.setup(str(effort or ""))
+
+    def commit(self) -> Dict[str, Any]:
+        if not self._dirty and self._commit_cache is not None:
+            return self._commit_cache
 
-    def commit(self) -> List[Any]:
+        fragment = self.to_data()
         if self.todos:
-            return [
-                self.to_data(),
-                [child.commit() for child in self.todos],
-            ]
+            fragment[TODOS] = [child.commit() for child in self.todos]
+
+        return self.mark_clean(fragment)
+
+    def from_data(self, data: Union[Dict, List], overwrite_uuid: bool = True) -> None:
+        if isinstance(data, dict):
+            self.fill_from_data(data, overwrite_uuid)
+            children = data.get(TODOS, [])
         else:
-            return [self.to_data()]
-
-    def from_data(self, data: List, overwrite_uuid: bool = True) -> None:
-        self.fill_from_data(data[0], overwrite_uuid)
-        if len(data) > 1:
-            for i in data[1]:
-                # Skips todos with no description and no children
-                if len(i) == 1 and not i[0]['description']:
-                    continue
-                # Don't skip the todo as the children might have data that would be lost otherwise
-                elif len(i) > 1 and not i[0]['description']:
-                    i[0]['description'] = '<Empty>'
-
-                child_todo = self.add_child(kind="todo", index=len(self.todos))
-                child_todo.from_data(i, overwrite_uuid)
+            # Version 2, a list of the fields and the children
+            self.fill_from_data(data[0], overwrite_uuid)
+            children = data[1] if len(data) > 1 else []
+
+        for i in children:
+            child = self.load_child(TODO)
+            child.from_data(i, overwrite_uuid)
+            self.check_loaded(child)
+
+        self.count_children()
+        self.settle_status()
+        self._status.handle_recurrence()
+
+    def from_packed(self, packed: Tuple) -> None:
+        """
+        Loads the packed form kept by the snapshot cache
+        """
+
+        uuid, *fields, todos = packed
+        self._uuid = uuid
+        self.setup_fields(*fields)
+
+        for todo in todos:
+            child = self.load_child(TODO)
+            child.from_packed(todo)
+            self.check_loaded(child)
+
+        self.count_children()
+        self.settle_status()
+        self._status.handle_recurrence()
+
+    def check_loaded(self, todo: "Todo") -> None:
+        if todo.description:
+            return
+
+        # Don't skip the todo as the children might have data that would be lost otherwise
+        if todo.todos:
+            todo._description.value = "<Empty>"
+        # Skips todos with no description and no children
+        else:
+            self.todos.remove(todo)
+
+    def settle_status(self) -> None:
+        counts = self._counts
+        if counts and counts.total:
+            # Settled once here instead of by every loaded child
+            self._status.set_pending(counts.done < counts.total)
 
     # ----------- HELPER FUNCTIONS --------------
     def has_due_date(self) -> bool:
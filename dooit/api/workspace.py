@@ -1,44 +1,153 @@
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from ..api.todo import Todo
 from .model import Model
+from .model_items import Description, SortMode
+from ..utils.search_index import SearchIndex
+from ..utils.sorting import SortKey, format_sort_keys
+from ..utils.schema import (
+    DEFERRED,
+    DESCRIPTION,
+    SORT_MODE,
+    TODOS,
+    UUID,
+    WORKSPACES,
+)
 
 WORKSPACE = "workspace"
 TODO = "todo"
 
 
 class Workspace(Model):
-    fields = ["description"]
+    fields = ["description", "sort_mode"]
     sortable_fields = ["description"]
 
     def __init__(self, parent: Optional["Model"] = None) -> None:
-        from .model_items import Description
-
+        self._todos_loader: Optional[Callable[[], None]] = None
         super().__init__(parent)
         self._description = Description(self)
+        self._sort_mode = SortMode(self)
+
+        # Models whose child todos were reordered by the sort mode, see `view_changed`
+        self._resorted: Dict[str, Model] = {}
 
     @property
     def description(self):
         return self._description.value
 
+    @property
+    def sort_mode(self) -> str:
+        return self._sort_mode.value
+
+    def get_sort_keys(self) -> List[SortKey]:
+        return self._sort_mode.keys
+
+    def set_sort_mode(self, keys: Sequence[SortKey]) -> None:
+        """
+        Keeps the todos sorted by the keys from now on, no keys go back to manual order
+        """
+
+        if list(keys) != self.get_sort_keys():
+            self._sort_mode.set(format_sort_keys(keys))
+            self.mark_dirty()
+
+    def pop_resorted(self) -> List[Model]:
+        """
+        Returns the models whose child todos were reordered since the last call
+        """
+
+        resorted = list(self._resorted.values())
+        self._resorted.clear()
+        return resorted
+
+    @property
+    def todos(self) -> List[Todo]:
+        self.load()
+        return self._todos
+
+    @todos.setter
+    def todos(self, todos: List[Todo]) -> None:
+        self._todos = todos
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        Returns False if the todos are still waiting in storage
+        """
+
+        return self._todos_loader is None
+
+    def load(self) -> None:
+        """
+        Reads in the todos still waiting in storage, if any
+        """
+
+        if self._todos_loader:
+            self._todos_loader()
+
+    def defer_todos(self, loader: Callable[["Workspace"], None]) -> None:
+        """
+        Leaves the todos of this workspace and its children in storage
+        until they are first accessed, `loader` is then called with this workspace
+        """
+
+        def load() -> None:
+            for workspace in self.get_all_workspaces():
+                workspace._todos_loader = None
+
+            loader(self)
+
+        for workspace in self.get_all_workspaces():
+            workspace._todos_loader = load
+
+    def get_search_index(self) -> Optional[SearchIndex]:
+        return self.get_root()._index
+
+    def get_searchable(self) -> List[Model]:
+        return self.get_all_todos()
+
+    def get_searchable_tree(self) -> List[Model]:
+        return self.get_all_workspaces()
+
+    def get_loaded_todos(self) -> List[Todo]:
+        if self.is_loaded:
+            return super().get_loaded_todos()
+
+        return [j for i in self.workspaces for j in i.get_loaded_todos()]
+
+    def count_children(self) -> None:
+        if self.is_loaded:
+            super().count_children()
+
+    def add_child(self, kind: str, index: int = 0, inherit: bool = False) -> Any:
+        # Children added before the todos are read in would be left out of the save
+        self.load()
+        return super().add_child(kind, index, inherit)
+
     def add_workspace(self, index: int = 0) -> "Workspace":
-        return super().add_child(WORKSPACE, index)
+        return self.add_child(WORKSPACE, index)
 
     def add_todo(self, index: int = 0) -> Todo:
-        return super().add_child(TODO, index)
+        return self.add_child(TODO, index)
 
     def commit(self) -> Dict[str, Any]:
+        if not self._dirty and self._commit_cache is not None:
+            return self._commit_cache
+
         child_workspaces = [
             workspace.commit() for workspace in self.workspaces if workspace.description
         ]
 
-        todos = [todo.commit() for todo in self.todos if todo.description]
+        fragment: Dict[str, Any] = {UUID: self.uuid, DESCRIPTION: self.description}
+        if sort_mode := self.sort_mode:
+            fragment[SORT_MODE] = sort_mode
+        if not self.is_loaded:
+            fragment[DEFERRED] = True
+        elif todos := [todo.commit() for todo in self.todos if todo.description]:
+            fragment[TODOS] = todos
+        if child_workspaces:
+            fragment[WORKSPACES] = child_workspaces
 
-        return {
-            "uuid": self.uuid,
-            "description": self.description,
-            "todos": todos,
-            "workspaces": child_workspaces,
-        }
+        return self.mark_clean(fragment)
 
     # WARNING: This will be deprecated in future versions
     def extract_data_old(self, data: Dict):
@@ -53,23 +162,53 @@ class Workspace(Model):
             workspace.edit("description", i)
             workspace.from_data(j)
 
+        self.count_children()
+
     def extract_data_new(self, data: Dict, overwrite_uuid: bool):
+        if UUID in data:
+            uuid, description = data[UUID], data[DESCRIPTION]
+            todos, workspaces = data.get(TODOS, []), data.get(WORKSPACES, [])
+        else:
+            # Version 2, with long keys and empty lists written out
+            uuid, description = data["uuid"], data["description"]
+            todos, workspaces = data["todos"], data["workspaces"]
+
         if overwrite_uuid:
-            self._uuid = data["uuid"]
+            self._uuid = uuid
 
-        self._description.set(data["description"])
+        self._description.setup(description)
+        self._sort_mode.setup(data.get(SORT_MODE, ""))
 
-        for todo in data["todos"]:
-            child_todo = self.add_todo(index=len(self.todos))
+        for todo in todos:
+            child_todo = self.load_child(TODO)
             child_todo.from_data(todo, overwrite_uuid)
 
-        for workspace in data["workspaces"]:
-            child_workspace = self.add_workspace(len(self.workspaces))
+        for workspace in workspaces:
+            child_workspace = self.load_child(WORKSPACE)
             child_workspace.from_data(workspace, overwrite_uuid)
 
+        self.count_children()
+
+    def from_packed(self, packed: Tuple) -> None:
+        """
+        Loads the packed form kept by the snapshot cache
+        """
+
+        self._uuid, description, sort_mode, todos, workspaces = packed
+        self._description.setup(description)
+        self._sort_mode.setup(sort_mode)
+
+        for todo in todos:
+            self.load_child(TODO).from_packed(todo)
+
+        for workspace in workspaces:
+            self.load_child(WORKSPACE).from_packed(workspace)
+
+        self.count_children()
+
     def from_data(self, data: Any, overwrite_uuid: bool = True) -> None:
         if isinstance(data, dict):
-            if "uuid" not in data:
+            if "uuid" not in data and UUID not in data:
                 self.extract_data_old(data)
             else:
                 self.extract_data_new(data, overwrite_uuid)
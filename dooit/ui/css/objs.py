@@ -25,7 +25,7 @@ MainScreen {{
     layout: vertical;
 }}
 
-HelpScreen {{
+HelpScreen, AgendaScreen {{
     layout: vertical;
     background: {BG};
     scrollbar-size: 1 1;
@@ -1,20 +1,23 @@
+from dooit.api.model import SortMethodType
 from .events import (
     ApplySort,
     ChangeStatus,
     Notify,
     StatusType,
-    SortMethodType,
     TopicSelect,
     SwitchTab,
     SpawnHelp,
+    SpawnAgenda,
     CommitData,
     DateModeSwitch,
     ExitApp,
+    SelectTodo,
 )
 
 __all__ = [
     "ApplySort",
     "SpawnHelp",
+    "SpawnAgenda",
     "ChangeStatus",
     "Notify",
     "StatusType",
@@ -24,4 +27,5 @@ __all__ = [
     "CommitData",
     "DateModeSwitch",
     "ExitApp",
+    "SelectTodo",
 ]
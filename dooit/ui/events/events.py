@@ -1,8 +1,10 @@
-from typing import Literal, Optional, Union
+from typing import List, Literal, Optional, Union
 from rich.text import TextType, Text
 from textual.message import Message
-from dooit.api.model import Result, SortMethodType
+from dooit.api.model import Result
+from dooit.api.todo import Todo
 from dooit.api.workspace import Workspace
+from dooit.utils.sorting import SortKey
 
 StatusType = Literal["NORMAL", "INSERT", "DATE", "SEARCH", "SORT", "K PENDING"]
 EmptyWidgetType = Literal["todo", "workspace", "no_search_results"]
@@ -27,6 +29,12 @@ class SpawnHelp(Message, bubble=True):
     """
 
 
+class SpawnAgenda(Message, bubble=True):
+    """
+    Emitted when the user wants to see the todos due soon
+    """
+
+
 class ChangeStatus(Message, bubble=True):
     """
     Emitted when there is a change in the `status`
@@ -64,16 +72,35 @@ class TopicSelect(Message, bubble=True):
         self.model = model
 
 
+class SelectTodo(Message, bubble=True):
+    """
+    Emitted when the user picks a todo which might be in another workspace
+    """
+
+    def __init__(self, todo: Todo) -> None:
+        super().__init__()
+        self.todo = todo
+
+
 class ApplySort(Message, bubble=True):
     """
     Emitted when the user wants to sort a tree
     """
 
-    def __init__(self, query: str, widget_id: str, method: SortMethodType) -> None:
+    def __init__(
+        self,
+        query: str,
+        widget_id: str,
+        keys: List[SortKey],
+        recursive: bool = False,
+        keep: bool = False,
+    ) -> None:
         super().__init__()
         self.query = query
         self.widget_id = widget_id
-        self.method = method
+        self.keys = keys
+        self.recursive = recursive
+        self.keep = keep
 
 
 class CommitData(Message):
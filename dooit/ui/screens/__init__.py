@@ -1,4 +1,5 @@
+from .agenda import AgendaScreen
 from .help import HelpScreen
 from .index import MainScreen
 
-__all__ = ["HelpScreen", "MainScreen"]
+__all__ = ["AgendaScreen", "HelpScreen", "MainScreen"]
@@ -0,0 +1,43 @@
+from textual.app import ComposeResult
+from textual import events
+from dooit.api.manager import manager
+from dooit.ui.events import SelectTodo
+from dooit.ui.widgets.agenda import Agenda
+from .base import BaseScreen
+
+
+class AgendaScreen(BaseScreen):
+    """
+    Agenda Screen to view the todos due soon across all workspaces
+    """
+
+    BINDINGS = [
+        ("escape", "app.pop_screen", "Pop screen"),
+    ]
+
+    def compose(self) -> ComposeResult:
+        yield Agenda(manager)
+
+    @property
+    def agenda(self) -> Agenda:
+        return self.query_one(Agenda)
+
+    def on_screen_resume(self) -> None:
+        self.agenda.refresh_groups()
+        self.scroll_home(animate=False)
+
+    async def on_key(self, event: events.Key):
+        agenda = self.agenda
+        key = self.resolve_key(event)
+        if key in ["j", "down"]:
+            agenda.move(agenda.current + 1)
+        elif key in ["k", "up"]:
+            agenda.move(agenda.current - 1)
+        elif key in ["home", "g"]:
+            agenda.move(0)
+        elif key in ["end", "G"]:
+            agenda.move(len(agenda.todos) - 1)
+        elif key in ["enter", "l"]:
+            if todo := agenda.current_todo:
+                self.app.pop_screen()
+                self.app.get_screen("main").post_message(SelectTodo(todo))
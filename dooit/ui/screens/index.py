@@ -1,5 +1,6 @@
 from textual import events, on, work
 from textual.containers import Container
+from textual.css.query import NoMatches
 from dooit.api.manager import manager
 from dooit.ui.events.events import DateModeSwitch
 from dooit.ui.widgets.empty import EmptyWidget
@@ -10,14 +11,20 @@ from dooit.ui.events import (
     Notify,
     ChangeStatus,
     SpawnHelp,
+    SpawnAgenda,
     CommitData,
     ApplySort,
+    SelectTodo,
 )
-from dooit.ui.widgets import WorkspaceTree, TodoTree, StatusBar
+from dooit.ui.widgets import WorkspaceTree, TodoTree, VirtualTodoTree, StatusBar
 from dooit.ui.widgets.inputs import Due
 from dooit.ui.widgets.tree import Tree
+from dooit.ui.widgets.virtual_todo_tree import TodoLines
+from dooit.utils.conf_reader import config_man
 from .base import BaseScreen
 
+VIRTUAL_TODOS = config_man.get("VIRTUAL_TODOS")
+
 
 class DualSplit(Container):
     pass
@@ -34,6 +41,9 @@ class DualSplitRight(Container):
 class MainScreen(BaseScreen):
     date_style = "classic"
 
+    # Todo to highlight once the tree of its workspace is up
+    selected_todo = None
+
     def compose(self):
         with DualSplit():
             with DualSplitLeft():
@@ -79,10 +89,21 @@ class MainScreen(BaseScreen):
                 current_widget = widgets.first()
                 current_widget.add_class("current")
             else:
-                current_widget = TodoTree(model)
+                tree_type = VirtualTodoTree if VIRTUAL_TODOS else TodoTree
+                current_widget = tree_type(model)
                 current_widget.add_class("current")
                 await self.query_one(DualSplitRight).mount(current_widget)
 
+            if todo := self.selected_todo:
+                self.selected_todo = None
+                try:
+                    current_widget.select(todo.uuid)
+                except NoMatches:
+                    return
+
+                if self.query_one(WorkspaceTree).has_class("focus"):
+                    self.post_message(SwitchTab())
+
     async def mount_dashboard(self) -> None:
         await self.clear_right()
         await self.mount(EmptyWidget(), after=self.query_one(WorkspaceTree))
@@ -98,7 +119,7 @@ class MainScreen(BaseScreen):
     @on(ApplySort)
     async def apply_sort(self, event: ApplySort) -> None:
         await self.query_one(event.query, expect_type=Tree).apply_sort(
-            event.widget_id, event.method
+            event.widget_id, event.keys, event.recursive, event.keep
         )
 
     @on(TopicSelect)
@@ -109,6 +130,24 @@ class MainScreen(BaseScreen):
         else:
             await self.mount_dashboard()
 
+    @on(SelectTodo)
+    async def select_todo(self, event: SelectTodo) -> None:
+        event.stop()
+        workspace = event.todo.parent
+        while workspace and workspace.kind == "todo":
+            workspace = workspace.parent
+
+        if workspace is None:
+            return
+
+        self.selected_todo = event.todo
+        tree = self.query_one(WorkspaceTree)
+        widget = tree.get_widget_by_id(workspace.uuid)
+        if tree.current is widget:
+            self.mount_todos(workspace)
+        else:
+            tree.current = widget
+
     @on(SwitchTab)
     async def switch_tab(self, _: SwitchTab) -> None:
         self.query_one(WorkspaceTree).toggle_class("focus")
@@ -126,6 +165,10 @@ class MainScreen(BaseScreen):
     async def spawn_help(self, _: SpawnHelp) -> None:
         self.app.push_screen("help")
 
+    @on(SpawnAgenda)
+    async def spawn_agenda(self, _: SpawnAgenda) -> None:
+        self.app.push_screen("agenda")
+
     @on(Notify)
     async def notify(self, event: Notify) -> None:
         self.query_one(StatusBar).set_message(event.message)
@@ -134,7 +177,8 @@ class MainScreen(BaseScreen):
     async def date_mode_switch(self, _: DateModeSwitch) -> None:
         self.date_style = "classic" if self.date_style != "classic" else "remaining"
         [i.refresh() for i in self.query(Due)]
+        [i.redraw() for i in self.query(TodoLines)]
 
     @on(CommitData)
     async def commit_data(self, _: CommitData) -> None:
-        manager.commit()
+        self.app.saver.request()
@@ -1,10 +1,16 @@
 import webbrowser
+from time import time
+from typing import Optional
 from textual.app import App
-from dooit.api.manager import manager
-from dooit.utils.watcher import Watcher
-from dooit.ui.widgets import WorkspaceTree, TodoTree
+from textual.timer import Timer
+from dooit.api.manager import manager, storage
+from dooit.utils.scheduler import SaveScheduler
+from dooit.utils.transitions import transitions
+from dooit.utils.watcher import InotifyWatcher, Watcher
+from dooit.api.model import Err
+from dooit.ui.widgets import WorkspaceTree, TodoTree, StatusBar
 from dooit.ui.css.main import screen_CSS
-from dooit.ui.screens import MainScreen, HelpScreen
+from dooit.ui.screens import MainScreen, HelpScreen, AgendaScreen
 from textual.binding import Binding
 
 PRINTABLE = (
@@ -19,6 +25,7 @@ class Dooit(App):
     SCREENS = {
         "main": MainScreen(name="main"),
         "help": HelpScreen(name="help"),
+        "agenda": AgendaScreen(name="agenda"),
     }
 
     BINDINGS = [
@@ -27,28 +34,104 @@ class Dooit(App):
     ]
 
     async def on_mount(self):
-        self.watcher = Watcher()
-        self.set_interval(1, self.poll)
+        self.saver = SaveScheduler(
+            manager._get_commit_data,
+            manager.save,
+            on_error=self.save_failed,
+        )
+        self.watcher = Watcher(storage.files)
+        self.inotify = InotifyWatcher(storage.files)
+        if storage.keeps_files_open or not self.inotify.start(self.data_changed):
+            self.set_interval(1, self.poll)
+
+        self._transition_timer: Optional[Timer] = None
+        self._transitions_changed = False
+        transitions.on_reschedule = self.transitions_changed
+
         self.push_screen("main")
 
     async def poll(self):
         if (
             not manager.is_locked()
+            and not self.saver.is_pending
             and self.watcher.has_modified()
-            and manager.refresh_data()
         ):
-            await self.query_one(WorkspaceTree).force_refresh(manager)
+            await self.reload_data()
+
+    def data_changed(self) -> None:
+        self.call_later(self.reload_data)
+
+    async def reload_data(self):
+        if manager.is_locked() or self.saver.is_pending:
+            # Check again once our own save is through
+            self.set_timer(0.5, self.reload_data)
+            return
+
+        if changes := manager.refresh_data():
+            await self.query_one(WorkspaceTree).apply_changes(changes)
+
             for i in self.query(TodoTree):
-                index = manager._get_child_index("workspace", uuid=i.model.uuid)
-                if index == -1:
+                workspace = manager.get_by_uuid(i.model.uuid)
+                if workspace is None:
                     i.remove()
+                elif workspace is not i.model:
+                    await i.force_refresh(workspace)
                 else:
-                    await i.force_refresh(manager._get_children("workspace")[index])
+                    await i.apply_changes(changes)
+
+    def transitions_changed(self) -> None:
+        # Statuses are read in bulk while rendering, reschedule once after
+        if not self._transitions_changed:
+            self._transitions_changed = True
+            self.call_later(self.schedule_transitions)
+
+    def schedule_transitions(self) -> None:
+        """
+        Sets the timer for the earliest moment a todo changes its status
+        """
+
+        self._transitions_changed = False
+        if self._transition_timer:
+            self._transition_timer.stop()
+            self._transition_timer = None
+
+        if (when := transitions.next_time) is not None:
+            self._transition_timer = self.set_timer(
+                max(when - time(), 0), self.run_transitions
+            )
+
+    async def run_transitions(self) -> None:
+        """
+        Refreshes the todos (and their parents) whose status changed by now
+        """
+
+        self._transition_timer = None
+        trees = list(self.query(TodoTree))
+        for status in transitions.pop_due():
+            status.refresh()
+            for tree in trees:
+                await tree.refresh_node(status.model)
+                await tree.refresh_node(status.model.parent)
+
+        # Turning overdue moves the todos sorted by status
+        for tree in trees:
+            await tree.sync_resorted()
+
+        self.schedule_transitions()
+
+    def save_failed(self, error: BaseException) -> None:
+        self.query_one(StatusBar).set_message(Err(f"Could not save: {error}").text())
 
     async def action_quit(self) -> None:
-        manager.commit()
+        self.saver.flush()
         return await super().action_quit()
 
+    async def on_unmount(self) -> None:
+        self.inotify.stop()
+        transitions.on_reschedule = None
+        if self.saver.is_pending:
+            self.saver.flush()
+
     async def action_open_url(self, url: str) -> None:
         webbrowser.open(url, new=2)
 
@@ -4,6 +4,7 @@ from .simple_input import SimpleInput
 from .help_menu import HelpMenu
 from .workspace_tree import WorkspaceTree
 from .todo_tree import TodoTree
+from .virtual_todo_tree import VirtualTodoTree
 from .empty import EmptyWidget
 from .inputs import Description
 
@@ -14,6 +15,7 @@ __all__ = [
     "SimpleInput",
     "HelpMenu",
     "TodoTree",
+    "VirtualTodoTree",
     "WorkspaceTree",
     "EmptyWidget",
     "Description",
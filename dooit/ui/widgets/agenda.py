@@ -0,0 +1,140 @@
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from typing import List, Optional, Tuple
+from rich.console import RenderableType
+from rich.text import Text
+from textual.geometry import Region
+from textual.widget import Widget
+from dooit.api.manager import Manager
+from dooit.api.todo import Todo
+from dooit.utils.conf_reader import config_man
+
+DATE_FORMAT = config_man.get("DATE_FORMAT")
+TIME_FORMAT = config_man.get("TIME_FORMAT")
+AGENDA_DAYS = config_man.get("AGENDA_DAYS")
+
+Group = Tuple[str, List[Todo]]
+
+
+def get_groups(manager: Manager, now: Optional[datetime] = None) -> List[Group]:
+    """
+    Returns the pending todos which are overdue or due in the next
+    `AGENDA_DAYS` days, grouped by day
+    """
+
+    now = now or datetime.now()
+    today = datetime.combine(now.date(), time())
+    tomorrow = today + timedelta(days=1)
+    due_index = manager.due_index
+
+    overdue, due_today = [], []
+    for todo in due_index.between(None, tomorrow):
+        (overdue if todo.is_overdue() else due_today).append(todo)
+
+    groups = [("Overdue", overdue), ("Today", due_today)]
+    upcoming = due_index.between(tomorrow, today + timedelta(days=AGENDA_DAYS))
+    for day, todos in groupby(upcoming, key=lambda i: i._due._value.date()):
+        if day == tomorrow.date():
+            title = "Tomorrow"
+        else:
+            title = day.strftime("%A")
+
+        groups.append((f"{title}, {day.strftime(DATE_FORMAT)}", list(todos)))
+
+    return [i for i in groups if i[1]]
+
+
+class Agenda(Widget):
+    """
+    Todos of all the workspaces by the day they are due
+    """
+
+    DEFAULT_CSS = """
+    Agenda {
+        height: auto;
+        padding: 1 2;
+    }
+    """
+
+    def __init__(self, manager: Manager) -> None:
+        super().__init__()
+        self.manager = manager
+        self.groups: List[Group] = []
+        self.todos: List[Todo] = []
+        self.lines: List[int] = []
+        self.current = 0
+
+    def refresh_groups(self) -> None:
+        self.manager.load_all()
+        self.groups = get_groups(self.manager)
+        self.todos = []
+        self.lines = []
+
+        # Every group has a line for its title, with a blank line before the others
+        line = 0
+        for index, (_, todos) in enumerate(self.groups):
+            line += 2 if index else 1
+            for todo in todos:
+                self.todos.append(todo)
+                self.lines.append(line)
+                line += 1
+
+        self.current = 0
+        self.refresh(layout=True)
+
+    @property
+    def current_todo(self) -> Optional[Todo]:
+        if self.todos:
+            return self.todos[self.current]
+
+    def move(self, index: int) -> None:
+        if not self.todos:
+            return
+
+        self.current = max(0, min(index, len(self.todos) - 1))
+        self.refresh()
+
+        y = self.virtual_region.y + self.styles.padding.top + self.lines[self.current]
+        self.screen.scroll_to_region(Region(0, y, 1, 1), animate=False)
+
+    def get_label(self, todo: Todo, overdue: bool) -> Text:
+        workspace = todo.parent
+        while isinstance(workspace, Todo):
+            workspace = workspace.parent
+
+        due = todo._due._value
+        if overdue:
+            when = todo.due
+        elif due.hour or due.minute:
+            when = due.strftime(TIME_FORMAT)
+        else:
+            when = ""
+
+        label = Text(f"{when:>12}  ", style="red" if overdue else "cyan")
+        label.append(f"{workspace.description}: ", style="dim")
+        label.append(todo.description)
+        return label
+
+    def render(self) -> RenderableType:
+        if not self.todos:
+            return Text(f"Nothing due in the next {AGENDA_DAYS} days!", style="dim")
+
+        res = Text()
+        index = 0
+        for title, todos in self.groups:
+            if index:
+                res.append("\n")
+
+            overdue = title == "Overdue"
+            res.append(
+                f" {title} ", style="b reverse " + ("red" if overdue else "green")
+            )
+            res.append("\n")
+            for todo in todos:
+                pointer = "> " if index == self.current else "  "
+                res.append(pointer)
+                res.append(self.get_label(todo, overdue))
+                res.append("\n")
+                index += 1
+
+        return res
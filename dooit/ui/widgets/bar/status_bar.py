@@ -42,9 +42,15 @@ class StatusBar(Widget):
         self.refresh()
 
     def get_params(self):
+        """
+        Arguments for the status widgets, taken on the loop since the tag
+        counts change along with the todos
+        """
+
         return {
             "status": self.status,
             "manager": manager,
+            "tags": manager.tag_index.counts,
         }
 
     async def replace_middle(self, new_widget: Optional[StatusMiddle] = None):
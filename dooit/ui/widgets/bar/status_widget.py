@@ -1,4 +1,4 @@
-from typing import Callable, Tuple
+from typing import Any, Callable, Dict, Tuple
 from textual.widget import Widget
 from textual import work
 from inspect import getfullargspec as get_args
@@ -39,13 +39,18 @@ class StatusWidget(Widget):
         self.func = func[0]
         delay = func[1]
 
-        self.refresh_value()
-
         if delay > 0:
             self.set_interval(delay, self.redraw)
 
+    def on_mount(self):
+        self.redraw()
+
     def redraw(self):
-        self.refresh_value()
+        from dooit.ui.widgets.bar.status_bar import StatusBar
+
+        # Gathered on the loop, only the function runs in the thread
+        bar = next(i for i in self.ancestors if isinstance(i, StatusBar))
+        self.refresh_value(bar.get_params())
         self.refresh(layout=True)
 
     def get_value(self, **kwargs) -> Text:
@@ -57,11 +62,8 @@ class StatusWidget(Widget):
         return value
 
     @work(exclusive=True, thread=True)
-    def refresh_value(self):
-        from dooit.ui.widgets.bar.status_bar import StatusBar
-
+    def refresh_value(self, params: Dict[str, Any]):
         try:
-            params = self.app.query_one(StatusBar).get_params()
             self._value = self.get_value(**params)
         except Exception:
             pass
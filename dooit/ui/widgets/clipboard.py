@@ -1,5 +1,5 @@
 from dooit.api.model import Model
-from dooit.ui.widgets.todo import TodoWidget
+from dooit.api.workspace import Workspace
 
 
 class Clipboard:
@@ -9,10 +9,29 @@ class Clipboard:
 
     data = None
 
-    def copy(self, widget: TodoWidget):
-        model: Model = widget.model
+    def copy(self, model: Model):
+        if isinstance(model, Workspace):
+            # Deferred todos would be missing from the copy
+            for i in model.get_all_workspaces():
+                i.load()
+
         self.data = model.commit()
 
     @property
     def has_data(self) -> bool:
         return bool(self.data)
+
+    def paste_after(self, model: Model) -> Model:
+        """
+        Adds the copied model as the next sibling of `model`
+        """
+
+        new = model.add_sibling()
+        new.from_data(self.data, False)
+        new.resort()
+        new.parent.recount()
+        new.reindex()
+        if new.kind == "todo":
+            new._status.update_parents()
+
+        return new
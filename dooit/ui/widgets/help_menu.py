@@ -108,6 +108,8 @@ NORMAL_KB = {
     "add child": "Add child todo/workspace",
     "sort menu toggle": "Launch sort menu",
     "start search": "Start Search Mode",
+    "filter tags": "List the todos of all workspaces by tag",
+    "spawn agenda": "Show the todos due this week across all workspaces",
     "switch pane": "Toggle focused pane",
     "switch pane workspace": "Change focus to workspace",
     "switch pane todo": "Change focus to todo",
@@ -154,6 +156,9 @@ SORT_KB = {
     "move up": "Move to previous sort option",
     "sort menu toggle": "Cancel sort operation",
     "enter": "Select the sorting method",
+    "space": "Sort by the option too, again to sort it descending or to drop it",
+    "r": "Sort the nested items as well",
+    "p": "Keep the todos sorted as they change, off goes back to your own order",
 }
 # ---------------- X -------------------------
 
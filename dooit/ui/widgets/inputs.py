@@ -15,10 +15,10 @@ RED = config_man.get("red")
 YELLOW = config_man.get("yellow")
 GREEN = config_man.get("green")
 ORANGE = config_man.get("orange")
-COLOR_URGENCY_1 = config_man.get(TODOS.get('urgency1_color'))
-COLOR_URGENCY_2 = config_man.get(TODOS.get('urgency2_color'))
-COLOR_URGENCY_3 = config_man.get(TODOS.get('urgency3_color'))
-COLOR_URGENCY_4 = config_man.get(TODOS.get('urgency4_color'))
+COLOR_URGENCY_1 = config_man.get(TODOS.get("urgency1_color"))
+COLOR_URGENCY_2 = config_man.get(TODOS.get("urgency2_color"))
+COLOR_URGENCY_3 = config_man.get(TODOS.get("urgency3_color"))
+COLOR_URGENCY_4 = config_man.get(TODOS.get("urgency4_color"))
 
 DATE_FORMAT = config_man.get("DATE_FORMAT")
 TIME_FORMAT = config_man.get("TIME_FORMAT")
@@ -43,15 +43,15 @@ class Description(SimpleInput):
         hint = ""
 
         if isinstance(model, Todo):
-            if todos := model.todos:
+            if model.todos:
                 hint: str = TODOS["children_hint"]
-                total = len(todos)
-                done = sum(i.status == "COMPLETED" for i in todos)
-                remaining = total - done
+                counts = model.counts
                 hint = hint.format(
-                    total=total,
-                    done=done,
-                    remaining=remaining,
+                    total=counts.total,
+                    done=counts.done,
+                    remaining=counts.total - counts.done,
+                    overdue=counts.overdue,
+                    descendants=counts.descendants,
                 )
         elif isinstance(model, Workspace):
             if workspaces := model.workspaces:
@@ -1,15 +1,39 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 from rich.console import RenderableType
 from rich.text import Span, Text
 from dooit.api.model import Model
+from dooit.api.todo import Todo
+from dooit.ui.events.events import SelectTodo
 from dooit.ui.widgets.base import HelperWidget
+from dooit.utils.conf_reader import config_man
+
+SEARCH_COLOR = config_man.get("SEARCH_COLOR")
+SEARCH_RESULTS = config_man.get("SEARCH_RESULTS")
+
+
+def get_spans(positions: List[int]) -> List[Span]:
+    """
+    Merges the matched positions into runs to highlight
+    """
+
+    spans = []
+    for i in positions:
+        if spans and spans[-1].end == i:
+            spans[-1] = Span(spans[-1].start, i + 1, SEARCH_COLOR)
+        else:
+            spans.append(Span(i, i + 1, SEARCH_COLOR))
+
+    return spans
 
 
 class SearchMenu(HelperWidget):
     _status = "SEARCH"
 
+    # Set when the search gave up on some candidates, better matches might be missing
+    truncated = False
+
     def __init__(self, model: Model, children_type):
-        super().__init__(id=f"SearchMenu-{model.uuid}")
+        super().__init__(id=f"{type(self).__name__}-{model.uuid}")
         self.current = 0
         self.filter = []
         self.children_type = children_type
@@ -25,13 +49,14 @@ class SearchMenu(HelperWidget):
 
     def refresh_options(self) -> None:
         self.filter = []
-        if self.children_type == "workspace":
-            options = self.model.get_all_workspaces()
-        else:
-            options = self.model.get_all_todos()
+        self.visible_options = self.get_options("")
 
-        self.options = [(i.description, i.uuid) for i in options]
-        self.visible_options = self.options[:]
+    def get_options(self, words: str) -> List[Tuple[str, str, List[Span]]]:
+        matches = self.model.search(words, SEARCH_RESULTS)
+        self.truncated = matches.truncated
+        return [
+            (i.model.description, i.model.uuid, get_spans(i.positions)) for i in matches
+        ]
 
     async def move_down(self) -> None:
         self.current = min(self.current + 1, len(self.visible_options) - 1)
@@ -43,11 +68,7 @@ class SearchMenu(HelperWidget):
         self.current = 0
 
     def apply_filter(self, words: str) -> None:
-        self.visible_options = [
-            (description, uuid)
-            for description, uuid in self.options
-            if all(word in description.lower() for word in words.lower().split())
-        ]
+        self.visible_options = self.get_options(words)
         self.filter = words
         self.reset_cursor()
         self.refresh()
@@ -65,28 +86,15 @@ class SearchMenu(HelperWidget):
                 query,
                 expect_type=Tree,
             )
-            tree.current = tree.get_widget_by_id(self.current_option)
+            tree.select(self.current_option)
 
         await self.hide()
         self.apply_filter("")
 
     def render(self) -> RenderableType:
         res = Text()
-        for index, (description, _) in enumerate(self.visible_options):
-            if isinstance(self.filter, list):
-                filter = " ".join(self.filter)
-            else:
-                filter = self.filter
-
-            description = Text(description)
-            plain = description.plain.lower()
-            filter = filter.lower()
-
-            if filter in plain:
-                highlight_start = plain.index(filter)
-                highlight_end = highlight_start + len(self.filter)
-                span = Span(highlight_start, highlight_end, "red")
-                description.spans.append(span)
+        for index, (description, _, spans) in enumerate(self.visible_options):
+            description = Text(description, spans=list(spans))
 
             if index == self.current:
                 pointer = Text("> ")
@@ -95,4 +103,60 @@ class SearchMenu(HelperWidget):
 
             res += pointer + description + Text("\n")
 
+        if self.truncated:
+            res += Text("  Too many matches to rank them all, keep typing\n", "dim")
+
         return res
+
+
+class TagMenu(SearchMenu):
+    """
+    Lists the todos of all the workspaces by their tags,
+    every word searched for has to start one of the tags
+    """
+
+    def __init__(self, model: Model):
+        super().__init__(model, "todo")
+
+    def refresh_options(self) -> None:
+        # Todos still waiting in storage are read in, their tags are needed too
+        self.model.get_root().load_all()
+
+        super().refresh_options()
+
+    def get_options(self, words: str) -> List[Tuple[str, str, List[Span]]]:
+        prefixes = tuple("@" + i.lstrip("@") for i in words.split())
+        tag_index = self.model.get_root().tag_index
+
+        options = []
+        for todo in tag_index.find(words.split())[:SEARCH_RESULTS]:
+            workspace = todo.parent
+            while isinstance(workspace, Todo):
+                workspace = workspace.parent
+
+            prefix = f"{workspace.description}: "
+            description = todo.description
+            spans = [Span(0, len(prefix), "dim")]
+
+            start = 0
+            for tag in todo.tags:
+                start = description.find(tag, start)
+                if prefixes and tag.startswith(prefixes):
+                    end = start + len(tag)
+                    spans.append(
+                        Span(len(prefix) + start, len(prefix) + end, SEARCH_COLOR)
+                    )
+                start += len(tag)
+
+            options.append((prefix + description, todo.uuid, spans))
+
+        return options
+
+    async def stop(self) -> None:
+        if uuid := self.current_option:
+            todo = self.model.get_root().get_by_uuid(uuid)
+            if todo is not None:
+                self.post_message(SelectTodo(todo))
+
+        await self.hide()
+        self.apply_filter("")
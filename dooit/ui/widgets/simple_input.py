@@ -59,13 +59,17 @@ class Input(Widget):
             Apply link opens to urls
             """
 
+            if "://" not in text.plain:
+                return
+
             pattern = r"https?://\S+|ftp://\S+"
             for i in re.findall(pattern, text.plain):
                 style = Style.from_meta({"@click": f"app.open_url('{i}')"})
                 text.highlight_words([i], style)
 
         def make_tags(text: Text):
-            text.highlight_regex(r"\@\w+", TAGS_COLOR)
+            if "@" in text.plain:
+                text.highlight_regex(r"\@\w+", TAGS_COLOR)
 
         value = Text.from_markup(self.draw().strip())
         make_links(value)
@@ -1,4 +1,4 @@
-from typing import Type, Union
+from typing import List, Type, Union
 from rich.console import RenderableType
 from rich.table import Table
 from rich.text import Text
@@ -7,11 +7,17 @@ from dooit.api.todo import Todo
 from dooit.api.workspace import Workspace
 from dooit.ui.events.events import ApplySort
 from dooit.ui.widgets.base import HelperWidget
+from dooit.utils.sorting import SortKey
 
 
 class SortOptions(HelperWidget):
     """
     A list class to show and select the items in a list
+
+    Fields can be picked to sort by several of them, the first one picked
+    deciding first. Picking a field again sorts it in descending order.
+    Toggling `recursive` sorts the children of the siblings all the way down too,
+    toggling `keep` keeps the todos sorted as they change instead
     """
 
     _status = "SORT"
@@ -22,10 +28,16 @@ class SortOptions(HelperWidget):
         self.options = model_type.sortable_fields
         self.highlighted = 0
         self._prev_highlighted = 0
+        self.picked: List[SortKey] = []
+        self.recursive = False
+        self.keep = False
         self.add_keys(
             {
                 "cancel": "<escape>",
                 "stop": "<enter>",
+                "pick key": " ",
+                "toggle recursive": "r",
+                "toggle keep": "p",
             }
         )
 
@@ -33,9 +45,21 @@ class SortOptions(HelperWidget):
     def selected_option(self) -> SortMethodType:
         return self.options[self.highlighted]
 
+    @property
+    def sort_keys(self) -> List[SortKey]:
+        return self.picked or [(self.selected_option, False)]
+
     def set_id(self, widget_id: str) -> None:
         self.widget_id = widget_id
 
+    def set_sort_mode(self, keys: List[SortKey]) -> None:
+        """
+        Starts off from the sort mode the todos are kept in, if any
+        """
+
+        self.picked = list(keys)
+        self.keep = bool(keys)
+
     def highlight(self, id: int) -> None:
         self.highlighted = id
         self.refresh(layout=True)
@@ -54,13 +78,53 @@ class SortOptions(HelperWidget):
             ApplySort(
                 query,
                 self.widget_id,
-                self.selected_option,
+                self.sort_keys,
+                self.recursive,
+                self.keep,
             )
         )
 
+        self.picked = []
+        self.recursive = False
+        self.keep = False
         await self.hide()
         await super().stop()
 
+    async def pick_key(self) -> None:
+        """
+        Cycles the highlighted field through ascending, descending and unpicked
+        """
+
+        option = self.selected_option
+        for index, (field, reverse) in enumerate(self.picked):
+            if field == option:
+                if reverse:
+                    self.picked.pop(index)
+                else:
+                    self.picked[index] = (field, True)
+                break
+        else:
+            self.picked.append((option, False))
+
+        self.refresh(layout=True)
+
+    async def toggle_recursive(self) -> None:
+        """
+        Switches between sorting the siblings only and their whole subtrees
+        """
+
+        self.recursive = not self.recursive
+        self.refresh()
+
+    async def toggle_keep(self) -> None:
+        """
+        Switches between sorting the todos once and keeping them sorted
+        """
+
+        if self.model_type == Todo:
+            self.keep = not self.keep
+            self.refresh(layout=True)
+
     async def move_down(self) -> None:
         """
         Moves the highlight down
@@ -93,6 +157,9 @@ class SortOptions(HelperWidget):
 
     async def cancel(self) -> None:
         self.highlighted = self._prev_highlighted
+        self.picked = []
+        self.recursive = False
+        self.keep = False
         await self.hide()
 
     def add_option(self, option: SortMethodType) -> None:
@@ -103,6 +170,7 @@ class SortOptions(HelperWidget):
         table = Table.grid()
         table.add_column("")
 
+        picked = {j[0]: (i, j[1]) for i, j in enumerate(self.picked, 1)}
         for index, option in enumerate(self.options):
             if index != self.highlighted:
                 option = "  " + option
@@ -112,7 +180,22 @@ class SortOptions(HelperWidget):
                 style = "bold"
 
             label = Text(option, style)
+            if key := picked.get(self.options[index]):
+                position, reverse = key
+                label.append(f" {position}{'↓' if reverse else '↑'}", "bold")
+
             label = Text("  ") + label
             table.add_row(label)
 
+        if self.recursive:
+            table.add_row(Text("    [x] nested items too", "bold"))
+        else:
+            table.add_row(Text("    [ ] nested items too", "dim"))
+
+        if self.model_type == Todo:
+            if self.keep:
+                table.add_row(Text("    [x] keep sorted", "bold"))
+            else:
+                table.add_row(Text("    [ ] keep sorted", "dim"))
+
         return table
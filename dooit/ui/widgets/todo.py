@@ -48,7 +48,7 @@ class TodoWidget(Node):
         self.urgency = Urgency(model=self.model)
 
     def _get_model_children(self) -> List[ModelType]:
-        return self.model.todos
+        return self.model.get_view("todo")
 
     async def set_urgency(self, val: int):
         self.model.set_urgency(val)
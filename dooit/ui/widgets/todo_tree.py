@@ -1,10 +1,12 @@
 from typing import List, Literal, Type
-from dooit.api.model import Model
+from dooit.api.manager import Change
+from dooit.api.model import Model, Warn
 from dooit.api.todo import Todo
 from dooit.api.workspace import Workspace
-from dooit.ui.events.events import SwitchTab
+from dooit.ui.events.events import ChangeStatus, CommitData, Notify, SwitchTab
 from dooit.ui.widgets.todo import TodoWidget
 from dooit.utils.conf_reader import config_man
+from dooit.utils.sorting import SortKey
 from .tree import Tree
 
 INITIAL_URGENCY = config_man.get("TODO").get("initial_urgency")
@@ -32,7 +34,55 @@ class TodoTree(Tree):
         return "todo"
 
     def get_children(self, parent: Model) -> List[ModelType]:
-        return parent.todos
+        return parent.get_view("todo")
+
+    async def sync_resorted(self) -> None:
+        """
+        Moves the widgets of the todos which the sort mode put elsewhere
+        """
+
+        if resorted := self.model.pop_resorted():
+            with self.app.batch_update():
+                for model in resorted:
+                    await self.sync_children(model)
+
+            self._rebuild_cache = True
+
+    async def keypress(self, key: str) -> None:
+        await super().keypress(key)
+        await self.sync_resorted()
+
+    async def apply_changes(self, changes: List[Change]) -> None:
+        for change in changes:
+            if change.type == "update" and change.model is self.model:
+                # The sort mode might have changed
+                return await self.force_refresh()
+
+        await super().apply_changes(changes)
+        await self.sync_resorted()
+
+    async def apply_sort(
+        self,
+        id_: str,
+        keys: List[SortKey],
+        recursive: bool = False,
+        keep: bool = False,
+    ) -> None:
+        if not (keep or self.model.get_sort_keys()):
+            return await super().apply_sort(id_, keys, recursive)
+
+        # Kept sorted in a view of their own, leaving the manual order as is
+        self.model.set_sort_mode(keys if keep else [])
+        await self.force_refresh()
+        self.post_message(ChangeStatus("NORMAL"))
+        self.post_message(CommitData())
+
+    async def shift_node(self, position: Literal["up", "down"]) -> None:
+        if self.model.get_sort_keys():
+            self.post_message(Notify(Warn("Todos are kept sorted, can't move them!")))
+            return
+
+        await super().shift_node(position)
 
     async def add_node(
         self, type_: Literal["child", "sibling"], edit: bool = True
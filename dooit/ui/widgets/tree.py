@@ -2,6 +2,7 @@ from typing import Any, List, Literal, Optional, Type, Union
 from textual.app import ComposeResult
 from textual.reactive import Reactive
 from textual.widget import Widget
+from dooit.api.manager import Change
 from dooit.api.workspace import Workspace
 from dooit.api.model import Model, Ok, Result, Warn
 from dooit.ui.events.events import (
@@ -9,17 +10,19 @@ from dooit.ui.events.events import (
     CommitData,
     DateModeSwitch,
     Notify,
+    SpawnAgenda,
     SpawnHelp,
     StatusType,
 )
 from dooit.ui.widgets.clipboard import Clipboard
 from dooit.ui.widgets.empty import EmptyWidget
 from dooit.ui.widgets.base import KeyWidget
-from dooit.ui.widgets.search_menu import SearchMenu
+from dooit.ui.widgets.search_menu import SearchMenu, TagMenu
 from dooit.ui.widgets.sort_options import SortOptions
 from dooit.ui.widgets.bar.status_bar import StatusBar
 from dooit.ui.widgets.todo import TodoWidget
 from dooit.ui.widgets.workspace import WorkspaceWidget
+from dooit.utils.sorting import SortKey, get_unmoved
 
 PRINTABLE = (
     "0123456789"
@@ -54,6 +57,7 @@ class Tree(KeyWidget, Widget):
         self.border_title = tree_name.replace("Tree", "s")  # Making it plural
         self.sort_menu = SortOptions(self.ModelType)
         self.search_menu = SearchMenu(self.model, self.ModelType.class_kind)
+        self.tag_menu = TagMenu(self.model)
 
     @property
     def is_cursor_available(self) -> bool:
@@ -103,6 +107,9 @@ class Tree(KeyWidget, Widget):
         if self.search_menu.styles.layer == "L4":
             return self.search_menu
 
+        if self.tag_menu.styles.layer == "L4":
+            return self.tag_menu
+
     def get_children(self, parent: Model) -> List[ModelType]:
         return parent.workspaces
 
@@ -112,6 +119,13 @@ class Tree(KeyWidget, Widget):
             expect_type=self.WidgetType,
         )
 
+    def select(self, id_: str) -> None:
+        """
+        Highlights the item with the id, raises `NoMatches` if it isn't in the tree
+        """
+
+        self.current = self.get_widget_by_id(id_)
+
     def change_highlights(
         self,
         old: Optional[WidgetType],
@@ -161,6 +175,7 @@ class Tree(KeyWidget, Widget):
 
     def compose(self) -> ComposeResult:
         yield self.search_menu
+        yield self.tag_menu
         yield self.sort_menu
         children = self.get_children(self.model)
 
@@ -196,10 +211,11 @@ class Tree(KeyWidget, Widget):
 
         with self.app.batch_update():
             for i in children:
-                widget = self.WidgetType(i)
-                await self.mount(widget)
+                await self.mount(self.WidgetType(i))
 
-                if was_expanded.get(i.uuid, False):
+            # Nested nodes are mounted along with their parents
+            for widget in self.query(self.WidgetType):
+                if was_expanded.get(widget.id, False):
                     widget.toggle_expand()
 
         self.current = None
@@ -209,6 +225,94 @@ class Tree(KeyWidget, Widget):
             pass
         self._rebuild_cache = True
 
+    async def apply_changes(self, changes: List[Change]) -> None:
+        """
+        Updates only the widgets affected by the changes from a reload
+        """
+
+        with self.app.batch_update():
+            for change in changes:
+                if change.type == "update":
+                    await self.refresh_node(change.model)
+                    await self.refresh_node(change.model.parent)
+                elif change.child_kind == self.model_class_kind:
+                    await self.sync_children(change.model)
+
+        self._rebuild_cache = True
+
+    async def refresh_node(self, model: Optional[Model]) -> None:
+        if not model:
+            return
+
+        for widget in self.query(f"#{model.uuid}"):
+            if isinstance(widget, self.WidgetType):
+                await widget.refresh_value()
+
+    async def sync_children(self, model: Model) -> None:
+        """
+        Mounts, removes and reorders the child widgets of `model`
+        to match its children
+        """
+
+        if model is self.model:
+            container = self
+        else:
+            try:
+                container = self.get_widget_by_id(model.uuid)
+            except Exception:
+                return
+
+            await container.refresh_value()
+
+        def child_widgets() -> List[Tree.WidgetType]:
+            return [i for i in container.children if isinstance(i, self.WidgetType)]
+
+        children = self.get_children(model)
+        positions = {id(j): i for i, j in enumerate(children)}
+
+        widgets = []
+        for widget in child_widgets():
+            if id(widget.model) in positions:
+                widgets.append(widget)
+                continue
+
+            if widget is self.current:
+                self.current = None
+            await widget.remove()
+
+        if model is self.model:
+            if children:
+                await self.query(EmptyWidget).remove()
+            elif not self.query(EmptyWidget):
+                await self.mount(EmptyWidget(self.model_class_kind))
+
+        # Only the widgets out of the longest run already in order are moved
+        unmoved = get_unmoved([positions[id(i.model)] for i in widgets])
+        existing = {id(j.model): (i in unmoved, j) for i, j in enumerate(widgets)}
+
+        prev = None
+        for child in children:
+            in_place, widget = existing.get(id(child), (False, None))
+            if widget is None:
+                widget = self.WidgetType(child)
+                if isinstance(container, self.WidgetType):
+                    widget.display = container.expanded
+
+                if prev:
+                    await container.mount(widget, after=prev)
+                elif nodes := child_widgets():
+                    await container.mount(widget, before=nodes[0])
+                else:
+                    await container.mount(widget)
+
+            elif not in_place:
+                if prev:
+                    container.move_child(widget, after=prev)
+                elif (nodes := child_widgets())[0] is not widget:
+                    container.move_child(widget, before=nodes[0])
+
+            prev = widget
+
     async def notify(self, message: str) -> None:
         self.post_message(Notify(message))
 
@@ -429,7 +533,7 @@ class Tree(KeyWidget, Widget):
         if not self.current:
             return
 
-        self.clipboard.copy(self.current)
+        self.clipboard.copy(self.node)
         self.current.flash()
         self.post_message(
             Notify(Ok(f"{self.ModelType.__name__} was copied to clipboard!"))
@@ -442,8 +546,7 @@ class Tree(KeyWidget, Widget):
         if not self.clipboard.has_data:
             return Warn("Nothing in the clipboard!")
 
-        model = self.current.model.add_sibling()
-        model.from_data(self.clipboard.data, False)
+        model = self.clipboard.paste_after(self.node)
         widget = self.WidgetType(model)
         await self.mount(widget, after=self.current)
         self.current = widget
@@ -477,11 +580,18 @@ class Tree(KeyWidget, Widget):
         for i in self.query(self.widget_type):
             await i.apply_filter(filter)
 
-    async def apply_sort(self, id_: str, method: str) -> None:
+    async def apply_sort(
+        self,
+        id_: str,
+        keys: List[SortKey],
+        recursive: bool = False,
+        keep: bool = False,
+    ) -> None:
         widget = self.get_widget_by_id(id_)
-        widget.model.sort(method)
+        widget.model.sort(keys, recursive)
         await self.force_refresh()
         self.post_message(ChangeStatus("NORMAL"))
+        self.post_message(CommitData())
 
     async def sort_menu_toggle(self) -> None:
         if not self.current:
@@ -490,6 +600,7 @@ class Tree(KeyWidget, Widget):
 
         self.sort_menu.set_id(str(self.current.id))
         if self.sort_menu.visible:
+            self.sort_menu.set_sort_mode(self.model.get_sort_keys())
             await self.sort_menu.start()
         else:
             await self.sort_menu.stop()
@@ -497,6 +608,9 @@ class Tree(KeyWidget, Widget):
     async def spawn_help(self) -> None:
         self.post_message(SpawnHelp())
 
+    async def spawn_agenda(self) -> None:
+        self.post_message(SpawnAgenda())
+
     async def change_status(self, status: StatusType) -> None:
         self.post_message(ChangeStatus(status))
 
@@ -506,6 +620,12 @@ class Tree(KeyWidget, Widget):
             await self.search_menu.start()
             await self.app.query_one(StatusBar).start_search(self.search_menu.id)
 
+    async def filter_tags(self) -> None:
+        if self.tag_menu.id:
+            self.tag_menu.refresh_options()
+            await self.tag_menu.start()
+            await self.app.query_one(StatusBar).start_search(self.tag_menu.id)
+
     async def switch_date_style(self):
         self.post_message(DateModeSwitch())
 
@@ -0,0 +1,625 @@
+from typing import Dict, List, Literal, Optional
+import pyperclip
+from rich.style import Style
+from rich.text import Text
+from textual.app import ComposeResult
+from textual.css.query import NoMatches
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widget import Widget
+from dooit.api.manager import Change
+from dooit.api.model import Model, Ok, Result, Warn, get_generation
+from dooit.api.todo import Todo
+from dooit.api.workspace import Workspace
+from dooit.ui.events.events import ChangeStatus, CommitData, Notify
+from dooit.ui.widgets.empty import EmptyWidget
+from dooit.ui.widgets.inputs import (
+    DATE_MAX_WIDTH,
+    Description,
+    Due,
+    Effort,
+    Recurrence,
+    Status,
+    Urgency,
+)
+from dooit.ui.widgets.simple_input import SimpleInput
+from dooit.ui.widgets.todo import TodoWidget
+from dooit.utils.conf_reader import config_man
+from dooit.utils.sorting import SortKey
+from .todo_tree import INITIAL_URGENCY, TodoTree
+
+POINTER_ICON = config_man.get("TODO").get("pointer")
+EXPANDED = config_man.get("TODO").get("start_expanded")
+TODOS_BG = config_man.get("TODOS_BACKGROUND")
+YANK = config_man.get("YANK_COLOR")
+
+# Drawn rows kept around before starting over
+CACHED_ROWS = 1024
+
+
+class RowEditor(TodoWidget):
+    """
+    Widget of a single todo, put over its row while it is being edited
+    """
+
+    DEFAULT_CSS = f"""
+    RowEditor {{
+        layer: L3;
+        background: {TODOS_BG};
+    }}
+    """
+
+    def _get_model_children(self) -> List[Todo]:
+        return []
+
+
+class RowTemplate(Widget):
+    """
+    Hidden inputs which are pointed at each todo in turn to draw its row
+    """
+
+    DEFAULT_CSS = """
+    RowTemplate {
+        display: none;
+    }
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        # Only there until the first row is drawn
+        placeholder = Todo()
+        self.status = Status(model=placeholder)
+        self.description = Description(model=placeholder)
+        self.effort = Effort(model=placeholder)
+        self.recurrence = Recurrence(model=placeholder)
+        self.due = Due(model=placeholder)
+        self.urgency = Urgency(model=placeholder)
+        self._colors: Dict[str, Style] = {}
+
+    def compose(self) -> ComposeResult:
+        yield self.status
+        yield self.description
+        yield self.effort
+        yield self.recurrence
+        yield self.due
+        yield self.urgency
+
+    def render_input(self, widget: SimpleInput, todo: Todo) -> Text:
+        widget.model = todo
+        widget.value = getattr(todo, widget._property)
+        text = widget.render()
+
+        if widget._property not in self._colors:
+            self._colors[widget._property] = Style(color=widget.rich_style.color)
+
+        text.stylize_before(self._colors[widget._property])
+        return text
+
+    def draw(self, todo: Todo, depth: int, pointer: bool, width: int) -> Text:
+        """
+        Lays out the row of a todo the same way as `TodoWidget` does
+        """
+
+        icon = POINTER_ICON if pointer else " " * len(POINTER_ICON)
+        left = Text(f" {icon} " + "  " * depth)
+        for widget in (self.status, self.description, self.effort, self.recurrence):
+            left += self.render_input(widget, todo)
+            left.append(" ")
+
+        right = self.render_input(self.due, todo)
+        right.truncate(DATE_MAX_WIDTH - 1, pad=True)
+        right.append(" ")
+        right += self.render_input(self.urgency, todo)
+        right.append(" ")
+
+        left.truncate(max(width - right.cell_len, 0), overflow="ellipsis", pad=True)
+        return left + right
+
+
+class TodoLines(ScrollView):
+    """
+    Draws the rows of a `VirtualTodoTree`, only the ones in view
+    """
+
+    COMPONENT_CLASSES = {"todo-lines--highlight", "todo-lines--yank"}
+
+    DEFAULT_CSS = f"""
+    TodoLines {{
+        width: 100%;
+        height: 1fr;
+        overflow-x: hidden;
+        scrollbar-size: 1 1;
+        layer: L2;
+    }}
+
+    TodoLines > .todo-lines--highlight {{
+        background: #fff 10%;
+    }}
+
+    TodoLines > .todo-lines--yank {{
+        background: {YANK};
+    }}
+    """
+
+    def __init__(self, todo_tree: "VirtualTodoTree") -> None:
+        super().__init__()
+        self.todo_tree = todo_tree
+        self._strips: Dict[int, Strip] = {}
+
+    def set_row_count(self, count: int) -> None:
+        self.virtual_size = Size(0, count)
+        self.redraw()
+
+    def redraw(self, *indexes: int) -> None:
+        """
+        Draws the given rows again, or all of them if none are given
+        """
+
+        if not indexes:
+            self._strips.clear()
+            self.refresh()
+            return
+
+        for index in indexes:
+            self._strips.pop(index, None)
+            self.refresh_lines(index)
+
+    def scroll_to_row(self, index: int) -> None:
+        top = round(self.scroll_offset.y)
+        height = self.scrollable_content_region.height
+        if not height:
+            return
+
+        if index < top:
+            self.scroll_to(y=index, animate=False)
+        elif index >= top + height:
+            self.scroll_to(y=index - height + 1, animate=False)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self.todo_tree.place_editor()
+
+    def render_line(self, y: int) -> Strip:
+        index = round(self.scroll_offset.y) + y
+        width = self.scrollable_content_region.width
+
+        strip = self._strips.get(index)
+        if strip is None or strip.cell_length != width:
+            if len(self._strips) >= CACHED_ROWS:
+                self._strips.clear()
+
+            strip = self._strips[index] = self.draw_row(index, width)
+
+        return strip
+
+    def draw_row(self, index: int, width: int) -> Strip:
+        tree = self.todo_tree
+        style = self.rich_style
+
+        if index >= len(tree.rows):
+            return Strip.blank(width, style)
+
+        if tree.rows[index] is tree.yanked:
+            style += self.get_component_rich_style("todo-lines--yank")
+        elif index == tree.cursor:
+            style += self.get_component_rich_style("todo-lines--highlight")
+
+        text = tree.draw_row(index, width)
+        strip = Strip(text.render(self.app.console), text.cell_len)
+        return strip.adjust_cell_length(width).apply_style(style)
+
+
+class VirtualTodoTree(TodoTree):
+    """
+    `TodoTree` which draws the todos as lines instead of mounting
+    a widget for each of them, only the todo being edited gets one
+    """
+
+    DEFAULT_CSS = """
+    VirtualTodoTree {
+        overflow: hidden hidden;
+    }
+    """
+
+    def __init__(self, model: Workspace):
+        super().__init__(model)
+        self.rows: List[Todo] = []
+        self.depths: List[int] = []
+        self.positions: Dict[int, int] = {}
+        self.cursor: Optional[int] = None
+        self.editor: Optional[RowEditor] = None
+        self.yanked: Optional[Todo] = None
+        self.lines = TodoLines(self)
+        self.template = RowTemplate()
+        self._expanded: Dict[str, bool] = {}
+        self._generation = -1
+
+    @property
+    def is_cursor_available(self) -> bool:
+        return self.cursor is not None
+
+    @property
+    def node(self) -> Model:
+        if self.cursor is not None:
+            return self.rows[self.cursor]
+
+        return self.model
+
+    def compose(self) -> ComposeResult:
+        yield self.search_menu
+        yield self.tag_menu
+        yield self.sort_menu
+        yield self.template
+        yield self.lines
+
+        self.rebuild()
+        if not self.rows:
+            self.lines.display = False
+            yield EmptyWidget(self.model_class_kind)
+
+    # ------------------------------------------
+
+    def is_expanded(self, todo: Todo) -> bool:
+        return self._expanded.get(todo.uuid, EXPANDED)
+
+    def rebuild(self) -> None:
+        """
+        Flattens the expanded todos into rows, keeping the cursor on its todo
+        """
+
+        current = self.node if self.cursor is not None else None
+        rows: List[Todo] = []
+        depths: List[int] = []
+
+        stack = [(i, 0) for i in reversed(self.get_children(self.model))]
+        while stack:
+            todo, depth = stack.pop()
+            rows.append(todo)
+            depths.append(depth)
+            if todo.todos and self.is_expanded(todo):
+                stack.extend((i, depth + 1) for i in reversed(todo.get_view("todo")))
+
+        self.rows, self.depths = rows, depths
+        self.positions = {id(j): i for i, j in enumerate(rows)}
+        self._generation = get_generation()
+
+        if not rows:
+            self.cursor = None
+        elif current is not None and self.cursor is not None:
+            self.cursor = self.positions.get(
+                id(current),
+                min(self.cursor, len(rows) - 1),
+            )
+
+        self.lines.set_row_count(len(rows))
+
+    async def update_rows(self) -> None:
+        """
+        Rebuilds the rows and swaps the empty screen in or out
+        """
+
+        self.rebuild()
+
+        empty = self.query(EmptyWidget)
+        if self.rows and empty:
+            await empty.remove()
+            self.lines.display = True
+        elif not self.rows and not empty:
+            self.lines.display = False
+            await self.mount(EmptyWidget(self.model_class_kind))
+
+        self.move_to(self.cursor)
+
+    def draw_row(self, index: int, width: int) -> Text:
+        return self.template.draw(
+            self.rows[index],
+            self.depths[index],
+            index == self.cursor,
+            width,
+        )
+
+    def move_to(self, index: Optional[int]) -> None:
+        if index is not None and self.rows:
+            index = max(0, min(index, len(self.rows) - 1))
+            self.lines.scroll_to_row(index)
+        else:
+            index = None
+
+        old, self.cursor = self.cursor, index
+        if old is None or index is None:
+            self.lines.redraw()
+        elif old != index:
+            self.lines.redraw(old, index)
+
+    def redraw_node(self, model: Optional[Model]) -> None:
+        """
+        Draws the rows of a todo and its parents again, as their hints count it
+        """
+
+        while isinstance(model, Todo):
+            if (index := self.positions.get(id(model))) is not None:
+                self.lines.redraw(index)
+
+            model = model.parent
+
+    def place_editor(self) -> None:
+        if self.editor and self.cursor is not None:
+            row = self.cursor - round(self.lines.scroll_offset.y)
+            self.editor.styles.offset = (0, row)
+
+    def get_todo(self, id_: str) -> Optional[Todo]:
+        """
+        Returns the todo of this workspace with the given uuid, if any
+        """
+
+        todo = self.model.get_root().get_by_uuid(id_)
+        if not isinstance(todo, Todo):
+            return None
+
+        parent = todo.parent
+        while isinstance(parent, Todo):
+            parent = parent.parent
+
+        if parent is self.model:
+            return todo
+
+    def select(self, id_: str) -> None:
+        todo = self.get_todo(id_)
+        if todo is None:
+            raise NoMatches(f"No todo with id {id_!r}")
+
+        parent = todo.parent
+        while isinstance(parent, Todo):
+            self._expanded[parent.uuid] = True
+            parent = parent.parent
+
+        self.rebuild()
+        self.move_to(self.positions[id(todo)])
+
+    # ------------------------------------------
+
+    async def force_refresh(self, model: Optional[Model] = None):
+        if model:
+            self.model = model
+
+        await self.update_rows()
+
+    async def apply_changes(self, changes: List[Change]) -> None:
+        self.model.pop_resorted()
+        await self.update_rows()
+
+    async def refresh_node(self, model: Optional[Model]) -> None:
+        self.redraw_node(model)
+
+    async def sync_children(self, model: Model) -> None:
+        await self.update_rows()
+
+    async def sync_resorted(self) -> None:
+        if self.model.pop_resorted() or self._generation != get_generation():
+            await self.update_rows()
+        elif self.cursor is not None:
+            self.redraw_node(self.node)
+
+    async def apply_filter(self, filter) -> None:
+        self.template.description.apply_filter(filter)
+        self.lines.redraw()
+
+    # ------------------------------------------
+
+    async def move_down(self) -> None:
+        if self.cursor is None:
+            self.move_to(0)
+        else:
+            self.move_to(self.cursor + 1)
+
+    async def move_up(self) -> None:
+        if self.cursor:
+            self.move_to(self.cursor - 1)
+
+    async def move_to_top(self) -> None:
+        self.move_to(0)
+
+    async def move_to_bottom(self) -> None:
+        self.move_to(len(self.rows) - 1)
+
+    async def toggle_expand(self, recursive: bool = False) -> None:
+        if self.cursor is None:
+            return
+
+        node = self.node
+        expand = not self.is_expanded(node)
+        self._expanded[node.uuid] = expand
+
+        if recursive:
+            nodes = [*node.todos]
+            while nodes:
+                todo = nodes.pop()
+                self._expanded[todo.uuid] = expand
+                nodes.extend(todo.todos)
+
+        await self.update_rows()
+
+    async def toggle_expand_parent(self) -> None:
+        if self.cursor is None:
+            return
+
+        parent = self.node.parent
+        if isinstance(parent, Todo):
+            self._expanded[parent.uuid] = False
+            self.rebuild()
+            self.move_to(self.positions[id(parent)])
+
+    async def shift_node(self, position: Literal["up", "down"]) -> None:
+        if self.cursor is None:
+            return
+
+        if self.model.get_sort_keys():
+            self.post_message(Notify(Warn("Todos are kept sorted, can't move them!")))
+            return
+
+        node = self.node
+        if position == "down":
+            node.shift_down()
+        else:
+            node.shift_up()
+
+        await self.update_rows()
+        self.post_message(CommitData())
+
+    async def add_first_child(self) -> None:
+        child = self.model.add_child(self.ModelType.class_kind)
+        child.set_urgency(INITIAL_URGENCY)
+        await self.update_rows()
+        self.move_to(self.positions[id(child)])
+        await self.start_edit("description")
+
+    async def add_node(
+        self, type_: Literal["child", "sibling"], edit: bool = True
+    ) -> None:
+        if not self.rows or self.cursor is None:
+            return await self.add_first_child()
+
+        node = self.node
+        if type_ == "child":
+            self._expanded[node.uuid] = True
+            new_node = node.add_child(self.ModelType.class_kind)
+        else:
+            new_node = node.add_sibling()
+
+        new_node.set_urgency(INITIAL_URGENCY)
+        await self.update_rows()
+        self.move_to(self.positions[id(new_node)])
+
+        if edit:
+            await self.start_edit("description")
+
+    async def remove_item(self) -> None:
+        if self.cursor is None:
+            return
+
+        node = self.node
+        siblings = node.parent.get_view("todo")
+        index = siblings.index(node)
+
+        # Moves to the next sibling, otherwise to the row above
+        if index + 1 < len(siblings):
+            self.cursor = self.positions[id(siblings[index + 1])]
+        elif self.cursor:
+            self.cursor -= 1
+        else:
+            self.cursor = None
+
+        node.drop()
+        await self.update_rows()
+        self.post_message(CommitData())
+        await self.change_status("NORMAL")
+
+    # ------------------------------------------
+
+    async def start_edit(self, field: str) -> Result:
+        if self.cursor is None:
+            return Warn("Nothing to edit!")
+
+        self.lines.scroll_to_row(self.cursor)
+        self.editor = RowEditor(self.node)
+        await self.mount(self.editor)
+        self.place_editor()
+        self.editor.highlight()
+        return self.editor.start_edit(field)
+
+    async def stop_edit(self, res: Result) -> None:
+        if not self.editor:
+            return
+
+        editor, self.editor = self.editor, None
+        await editor.remove()
+
+        self.post_message(CommitData())
+        self.post_message(ChangeStatus("NORMAL"))
+        self.post_message(Notify(res.text()))
+        if res.cancel_op:
+            await self.remove_item()
+
+        await self.sync_resorted()
+
+    async def keypress(self, key: str) -> None:
+        if self.editor and not self.current_visible_widget:
+            await self.editor.keypress(key)
+            await self.sync_resorted()
+        else:
+            await super().keypress(key)
+
+    # ------------------------------------------
+
+    async def increase_urgency(self) -> None:
+        self.node.increase_urgency()
+
+    async def decrease_urgency(self) -> None:
+        self.node.decrease_urgency()
+
+    async def toggle_complete(self) -> None:
+        self.node.toggle_complete()
+
+    async def copy_text(self) -> None:
+        if self.cursor is None:
+            return
+
+        pyperclip.copy(self.node.description)
+        self.post_message(Notify(Ok("Text was copied to clipboard!")))
+
+    def unflash(self) -> None:
+        yanked, self.yanked = self.yanked, None
+        self.redraw_node(yanked)
+
+    async def yank(self) -> None:
+        if self.cursor is None:
+            return
+
+        self.clipboard.copy(self.node)
+        self.yanked = self.node
+        self.lines.redraw(self.cursor)
+        self.set_timer(0.5, self.unflash)
+        self.post_message(Notify(Ok("Todo was copied to clipboard!")))
+
+    async def paste(self) -> Result:
+        if self.cursor is None:
+            return Warn()
+
+        if not self.clipboard.has_data:
+            return Warn("Nothing in the clipboard!")
+
+        model = self.clipboard.paste_after(self.node)
+        await self.update_rows()
+        self.move_to(self.positions[id(model)])
+        return Ok()
+
+    async def sort_menu_toggle(self) -> None:
+        if self.cursor is None:
+            self.post_message(Notify(Warn("No item selected!")))
+            return
+
+        self.sort_menu.set_id(self.node.uuid)
+        if self.sort_menu.visible:
+            self.sort_menu.set_sort_mode(self.model.get_sort_keys())
+            await self.sort_menu.start()
+        else:
+            await self.sort_menu.stop()
+
+    async def apply_sort(
+        self,
+        id_: str,
+        keys: List[SortKey],
+        recursive: bool = False,
+        keep: bool = False,
+    ) -> None:
+        if keep or self.model.get_sort_keys():
+            self.model.set_sort_mode(keys if keep else [])
+        else:
+            if todo := self.get_todo(id_):
+                todo.sort(keys, recursive)
+
+        await self.update_rows()
+        self.post_message(ChangeStatus("NORMAL"))
+        self.post_message(CommitData())
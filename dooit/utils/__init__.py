@@ -1,5 +1,6 @@
 from .parser import Parser
+from .storage import Storage, get_storage
 from .watcher import Watcher
 from .date_parser import parse
 
-__all__ = ["Parser", "Watcher", "parse"]
+__all__ = ["Parser", "Storage", "Watcher", "get_storage", "parse"]
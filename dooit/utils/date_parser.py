@@ -1,13 +1,143 @@
-from datetime import datetime
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 from typing import Optional, Tuple
 from dateutil import parser
+from dateutil.relativedelta import relativedelta
+from dooit.utils.conf_reader import config_man
 
+DAY_FIRST = config_man.get("USE_DAY_FIRST")
 
-def parse(value: str) -> Tuple[Optional[datetime], bool]:
-    from dooit.utils.conf_reader import config_man
+# Number of recent inputs whose results are kept
+CACHED_DATES = 256
 
-    DAY_FIRST = config_man.get("USE_DAY_FIRST")
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+OFFSET_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+OFFSET = re.compile(r"\+?(\d+)([mhdw])")
+TIME = re.compile(r"(\d{1,2}):(\d{2})")
+DAY_MONTH = re.compile(r"(\d{1,2})[-/.](\d{1,2})(?:[-/.](\d{4}|\d{2}))?")
+ISO = re.compile(
+    r"\d{4}-\d{2}-\d{2}"
+    r"(?:[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?"
+)
+
+Parsed = Tuple[Optional[datetime], bool]
+
+
+def parse_day(value: str, today: date) -> Optional[date]:
+    """
+    Parses a date written in one of the common forms,
+    None if it is written some other way
+    """
+
+    if value == "today":
+        return today
+
+    if value == "tomorrow":
+        return today + timedelta(days=1)
+
+    if match := OFFSET.fullmatch(value):
+        count, unit = match.groups()
+        if unit in "dw":
+            return today + timedelta(**{OFFSET_UNITS[unit]: int(count)})
+
+        return
+
+    if match := DAY_MONTH.fullmatch(value):
+        first, second, year = match.groups()
+        day, month = (first, second) if DAY_FIRST else (second, first)
+        if year is None:
+            res = date(today.year, int(month), int(day))
+
+            # Dates without a year are the next ones to come
+            return res if res >= today else res.replace(year=today.year + 1)
+
+        year = int(year) + (2000 if len(year) == 2 else 0)
+        return date(year, int(month), int(day))
+
+    if len(value) >= 3:
+        for index, name in enumerate(WEEKDAYS):
+            if name.startswith(value):
+                # Today counts as the next one, like with dateutil
+                return today + timedelta(days=(index - today.weekday()) % 7)
+
+
+def parse_native(value: str, today: date) -> Optional[datetime]:
+    """
+    Parses the common forms without dateutil: today, tomorrow, weekdays,
+    offsets of days or weeks like `+3d`, `dd-mm[-yy]` and ISO dates,
+    all but ISO optionally followed by a time like `@10:30`
+    """
+
+    if ISO.fullmatch(value):
+        res = datetime.fromisoformat(value.upper())
+        if res.tzinfo:
+            res = res.astimezone().replace(tzinfo=None)
+
+        return res
+
+    day, _, at = value.partition("@")
+    clock = time()
+    if at:
+        if not (match := TIME.fullmatch(at.strip())):
+            return
+
+        clock = time(int(match[1]), int(match[2]))
+
+    if res := parse_day(day.strip(), today):
+        return datetime.combine(res, clock)
+
+
+@lru_cache(maxsize=CACHED_DATES)
+def parse_cached(value: str, today: date) -> Parsed:
+    """
+    Parses a value whose result only depends on the day, so it can be kept
+    """
+
+    try:
+        if res := parse_native(value, today):
+            return res, True
+    except ValueError:
+        # Out of range for the native forms, like `12-30` with days first,
+        # dateutil might still read it some other way
+        pass
+
+    default = datetime.combine(today, time())
     try:
-        return parser.parse(value, dayfirst=DAY_FIRST), True
-    except parser.ParserError:
+        res = parser.parse(value, dayfirst=DAY_FIRST, default=default)
+    except (parser.ParserError, OverflowError):
         return None, False
+
+    # Dates without a year are the next ones to come
+    if res.date() < today and str(today.year) not in value:
+        res += relativedelta(years=1)
+
+    return res, True
+
+
+def parse(value: str) -> Parsed:
+    """
+    Parses a due date as typed, returns whether it could be parsed along with it
+    """
+
+    value = value.strip().lower()
+    now = datetime.now()
+
+    # Only these depend on the time of the day, they aren't cached
+    if value == "now":
+        return now.replace(second=0, microsecond=0), True
+
+    if (match := OFFSET.fullmatch(value)) and match[2] in "mh":
+        offset = timedelta(**{OFFSET_UNITS[match[2]]: int(match[1])})
+        return (now + offset).replace(second=0, microsecond=0), True
+
+    return parse_cached(value, now.date())
@@ -66,11 +66,22 @@ BORDER_LIT = blue
 BORDER_TITLE_DIM = grey, dark_black
 BORDER_TITLE_LIT = white, blue
 SEARCH_COLOR = red
+SEARCH_RESULTS = 100  # best matches listed while searching
 YANK_COLOR = blue
 SAVE_ON_ESCAPE = False
 USE_DAY_FIRST = True
 DATE_FORMAT = "%d %h"
 TIME_FORMAT = "%H:%M"
+AGENDA_DAYS = 7  # days listed on the agenda, starting today
+VIRTUAL_TODOS = False  # draw todos as lines instead of widgets, for huge workspaces
+
+#################################
+#            STORAGE            #
+#################################
+STORAGE = "yaml"  # "yaml", "sqlite" or "sharded" (a file per workspace)
+SAVE_DELAY = 0.5  # seconds to gather edits before saving them in the background
+USE_JOURNAL = False  # append edits to a log instead of rewriting the data file
+JOURNAL_COMPACT_THRESHOLD = 500  # operations to log before rewriting the data file
 
 #################################
 #          DASHBOARD            #
@@ -156,7 +167,7 @@ TODO = {
     "pointer": ">",
     "children_hint": colored(
         " ({done}/{total})", green
-    ),  # vars: remaining, done, total
+    ),  # vars: remaining, done, total, overdue, descendants
     # "children_hint": "[b magenta]({remaining}!)[/b magenta]",
     "due_icon": "? ",
     "effort_icon": "+",
@@ -0,0 +1,136 @@
+import random
+from time import perf_counter
+from typing import Callable, Dict, List
+from . import serializer
+from .schema import (
+    DESCRIPTION,
+    DUE,
+    EFFORT,
+    RECURRENCE,
+    STATUS,
+    TODOS,
+    URGENCY,
+    UUID,
+    wrap,
+)
+
+BENCHMARK_SIZES = [1_000, 10_000, 100_000]
+
+# Strings that yaml could easily mistake for other types
+TRICKY_DESCRIPTIONS = [
+    "yes",
+    "no",
+    "null",
+    "~",
+    "1",
+    "1.0",
+    "0x1f",
+    "2023-01-01",
+    "12:30",
+    "- not a list",
+    "key: value",
+    "# not a comment",
+    "'quoted'",
+    '"double quoted"',
+    "trailing space ",
+    " leading space",
+    "multi\nline",
+    "tab\there",
+    "ünïcödé ✓ 日本語",
+    "emoji 🚀",
+    "!tag",
+    "&anchor *alias",
+    "%d %h @ %H:%M",
+    "+tag @context %1d",
+]
+
+
+def synthetic_data(count: int, seed: int = 0) -> Dict:
+    """
+    Generates commit data with `count` todos spread over a few workspaces
+    """
+
+    rng = random.Random(seed)
+    words = ["buy", "call", "write", "fix", "review", "plan", "read", "milk", "docs"]
+
+    def todo(index: int) -> Dict:
+        description = " ".join(rng.choices(words, k=rng.randint(1, 6)))
+        if index % 50 == 0:
+            description = rng.choice(TRICKY_DESCRIPTIONS)
+
+        fields = {
+            STATUS: rng.choice([None, 1]),
+            URGENCY: rng.choice([None, 2, 3, 4]),
+            DUE: rng.choice([None, 1_700_000_000 + index * 3600]),
+            EFFORT: rng.choice([None, rng.randint(1, 20)]),
+            RECURRENCE: rng.choice([None, None, None, "1d", "2w", "12h"]),
+        }
+
+        data = {UUID: f"todo_{seed}_{index}", DESCRIPTION: description}
+        data.update((i, j) for i, j in fields.items() if j is not None)
+        return data
+
+    workspaces = []
+    index = 0
+    while index < count:
+        todos = []
+        for _ in range(min(count - index, max(count // 10, 1))):
+            if todos and rng.random() < 0.2:
+                rng.choice(todos).setdefault(TODOS, []).append(todo(index))
+            else:
+                todos.append(todo(index))
+
+            index += 1
+
+        workspaces.append(
+            {
+                UUID: f"workspace_{seed}_{len(workspaces)}",
+                DESCRIPTION: f"workspace {len(workspaces)}",
+                TODOS: todos,
+            }
+        )
+
+    return wrap(workspaces)
+
+
+def measure(func: Callable) -> float:
+    start = perf_counter()
+    func()
+    return perf_counter() - start
+
+
+def check_round_trip() -> bool:
+    corpus = [synthetic_data(1_000, seed=1)]
+    for i in TRICKY_DESCRIPTIONS:
+        corpus.append(wrap([{UUID: "workspace_1", DESCRIPTION: i}]))
+
+    return all(serializer.round_trips(i) for i in corpus)
+
+
+def run(sizes: List[int] = BENCHMARK_SIZES) -> None:
+    """
+    Prints which yaml engine is used along with benchmarks of all engines
+    """
+
+    print(f"yaml engine: {serializer.ENGINE}")
+    print(f"available engines: {', '.join(serializer.ENGINES)}")
+    print(f"round trip: {'ok' if check_round_trip() else 'FAILED'}", flush=True)
+
+    print()
+    print(f"{'todos':>8}  {'engine':<8}  {'size':>9}  {'dump':>8}  {'load':>8}")
+    for size in sizes:
+        data = synthetic_data(size)
+        for engine in serializer.ENGINES:
+            content = ""
+
+            def dump():
+                nonlocal content
+                content = serializer.dump(data, engine)
+
+            dump_time = measure(dump)
+            load_time = measure(lambda: serializer.load(content, engine))
+            print(
+                f"{size:>8}  {engine:<8}  {len(content.encode()):>9}"
+                f"  {dump_time:>7.3f}s  {load_time:>7.3f}s",
+                flush=True,
+            )
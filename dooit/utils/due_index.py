@@ -0,0 +1,76 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Key = Tuple[float, str]
+
+
+class DueIndex:
+    """
+    Pending todos with a due date, sorted by it
+
+    The keys are kept in a sorted list, so that the todos due within a range
+    are found in O(log n + k)
+    """
+
+    def __init__(self, todos: Iterable[Any] = ()) -> None:
+        self.models: Dict[str, Any] = {}
+        self.dues: Dict[str, Key] = {}
+
+        for i in todos:
+            if key := self.get_key(i):
+                self.dues[key[1]] = key
+                self.models[key[1]] = i
+
+        self.keys: List[Key] = sorted(self.dues.values())
+
+    @staticmethod
+    def get_key(todo: Any) -> Optional[Key]:
+        due = todo._due._value
+        if due and todo._status.pending:
+            return due.timestamp(), todo.uuid
+
+    def add(self, todo: Any) -> None:
+        """
+        Indexes the todo, again if its due date or completion changed
+        """
+
+        key = self.get_key(todo)
+        uuid = key[1] if key else todo.uuid
+        old = self.dues.get(uuid)
+        if old == key:
+            if key:
+                self.models[uuid] = todo
+            return
+
+        if old:
+            del self.keys[bisect_left(self.keys, old)]
+
+        if key:
+            insort(self.keys, key)
+            self.dues[uuid] = key
+            self.models[uuid] = todo
+        else:
+            del self.dues[uuid]
+            del self.models[uuid]
+
+    def discard(self, todo: Any) -> None:
+        uuid = todo.uuid
+        if (key := self.dues.pop(uuid, None)) is None:
+            return
+
+        del self.keys[bisect_left(self.keys, key)]
+        del self.models[uuid]
+
+    def between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[Any]:
+        """
+        Returns the todos due from `start` up to (not including) `end`,
+        earliest first. Leaving out a bound leaves the range open on that end
+        """
+
+        keys = self.keys
+        lo = 0 if start is None else bisect_left(keys, (start.timestamp(),))
+        hi = len(keys) if end is None else bisect_left(keys, (end.timestamp(),))
+        return [self.models[i] for _, i in keys[lo:hi]]
@@ -0,0 +1,235 @@
+import json
+import os
+from collections import defaultdict
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .schema import DESCRIPTION, SORT_MODE, TODOS, UUID, WORKSPACES, wrap
+
+Record = Dict[str, Any]
+Records = Dict[str, Record]
+Operation = Dict[str, Any]
+
+# Keys of a record which are not fields of the model
+META = ["kind", "parent", "after"]
+
+
+def flatten(data: Dict) -> Records:
+    """
+    Flattens the nested commit data into uuid keyed records
+
+    Each record keeps a reference to its parent uuid and to the sibling
+    it comes after so that the tree can be rebuilt. Unlike positions, adding
+    or moving an item only changes the records of its neighbours
+    """
+
+    records: Records = {}
+
+    def add(uuid: str, record: Record) -> None:
+        if uuid in records:
+            raise ValueError(f"Duplicate uuid found: {uuid}")
+
+        records[uuid] = record
+
+    def walk_todo(todo: Dict, parent: str, after: Optional[str]) -> str:
+        fields = {i: j for i, j in todo.items() if i != TODOS}
+        uuid = fields.pop(UUID)
+        add(uuid, {"kind": "todo", "parent": parent, "after": after, **fields})
+
+        walk(walk_todo, todo.get(TODOS, []), uuid)
+        return uuid
+
+    def walk_workspace(
+        workspace: Dict, parent: Optional[str], after: Optional[str]
+    ) -> str:
+        uuid = workspace[UUID]
+        record = {
+            "kind": "workspace",
+            "parent": parent,
+            "after": after,
+            DESCRIPTION: workspace[DESCRIPTION],
+        }
+        if sort_mode := workspace.get(SORT_MODE):
+            record[SORT_MODE] = sort_mode
+
+        add(uuid, record)
+
+        walk(walk_todo, workspace.get(TODOS, []), uuid)
+        walk(walk_workspace, workspace.get(WORKSPACES, []), uuid)
+        return uuid
+
+    def walk(walker: Callable, children: List[Dict], parent: Optional[str]) -> None:
+        after = None
+        for child in children:
+            after = walker(child, parent, after)
+
+    walk(walk_workspace, data["workspaces"], None)
+    return records
+
+
+def unflatten(records: Records) -> Dict:
+    """
+    Rebuilds the nested commit data from flattened records
+    """
+
+    # The sibling coming after each one, by parent and kind
+    nexts: Dict[Tuple, Dict[Optional[str], str]] = defaultdict(dict)
+    strays: Dict[Tuple, List[str]] = defaultdict(list)
+    for uuid, record in records.items():
+        key = (record["parent"], record["kind"])
+        after = record.get("after")
+        if after in nexts[key]:
+            strays[key].append(uuid)
+        else:
+            nexts[key][after] = uuid
+
+    def get_children(uuid: Optional[str], kind: str) -> List[str]:
+        siblings = nexts.get((uuid, kind), {})
+        children = []
+        after = None
+        while (after := siblings.pop(after, None)) is not None:
+            children.append(after)
+
+        # Left over if the chain is broken, better kept out of place than lost
+        children.extend(siblings.values())
+        children.extend(strays.get((uuid, kind), []))
+        return children
+
+    def build(uuid: str) -> Dict:
+        record = records[uuid]
+        data = {UUID: uuid}
+        data.update((i, j) for i, j in record.items() if i not in META)
+
+        if todos := get_children(uuid, "todo"):
+            data[TODOS] = [build(i) for i in todos]
+
+        if record["kind"] == "workspace":
+            if workspaces := get_children(uuid, "workspace"):
+                data[WORKSPACES] = [build(i) for i in workspaces]
+
+        return data
+
+    return wrap([build(i) for i in get_children(None, "workspace")])
+
+
+def diff(old: Records, new: Records) -> List[Operation]:
+    """
+    Returns the operations required to turn `old` records into `new` ones
+
+    Fields which were dropped (back to their default) are set to None
+    """
+
+    ops: List[Operation] = []
+    for uuid, record in new.items():
+        prev = old.get(uuid)
+        if prev is None:
+            ops.append({"op": "add", "uuid": uuid, "record": record})
+            continue
+
+        changed = {i: j for i, j in record.items() if prev.get(i) != j}
+        changed.update((i, None) for i in prev if i not in record)
+        if changed:
+            ops.append({"op": "set", "uuid": uuid, "fields": changed})
+
+    for uuid in old:
+        if uuid not in new:
+            ops.append({"op": "del", "uuid": uuid})
+
+    return ops
+
+
+def apply(records: Records, ops: List[Operation]) -> Records:
+    """
+    Applies the operations on the records in place
+    """
+
+    for op in ops:
+        kind, uuid = op["op"], op["uuid"]
+        if kind == "add":
+            records[uuid] = dict(op["record"])
+        elif kind == "set":
+            if record := records.get(uuid):
+                for i, j in op["fields"].items():
+                    if j is None:
+                        record.pop(i, None)
+                    else:
+                        record[i] = j
+        elif kind == "del":
+            records.pop(uuid, None)
+
+    return records
+
+
+class Journal:
+    """
+    Append-only log of operations on top of the data snapshot
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = 0
+        self.reset_digest()
+
+    @property
+    def digest(self) -> str:
+        """
+        Digest of the log contents as last read or written
+        """
+
+        return self._hasher.hexdigest()
+
+    def reset_digest(self) -> None:
+        self._hasher = sha256()
+        self.size = 0
+
+    def _track(self, content: bytes) -> None:
+        self._hasher.update(content)
+        self.size += len(content)
+
+    def append(self, ops: List[Operation]) -> None:
+        """
+        Appends the operations to the log
+        """
+
+        lines = "".join(json.dumps(op, separators=(",", ":")) + "\n" for op in ops)
+        content = lines.encode()
+        with open(self.path, "ab") as stream:
+            stream.write(content)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        self.count += len(ops)
+        self._track(content)
+
+    def replay(self) -> List[Operation]:
+        """
+        Reads back all the operations stored in the log
+        """
+
+        ops = []
+        self.reset_digest()
+        if self.path.is_file():
+            with open(self.path, "rb") as stream:
+                content = stream.read()
+
+            self._track(content)
+            for line in content.splitlines():
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    # A partially written tail, nothing after it is usable
+                    break
+
+        self.count = len(ops)
+        return ops
+
+    def clear(self) -> None:
+        """
+        Empties the log, used after compacting into a snapshot
+        """
+
+        with open(self.path, "wb"):
+            pass
+
+        self.count = 0
+        self.reset_digest()
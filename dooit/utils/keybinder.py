@@ -14,9 +14,11 @@ class Bind:
         "move_up",
         "switch_pane",
         "spawn_help",
+        "spawn_agenda",
         "switch_pane_workspace",
         "start_search",
         "stop_search",
+        "filter_tags",
     ]
 
     def __init__(self, func_name: str, params: List[str]) -> None:
@@ -48,7 +50,9 @@ DEFAULTS = {
     "move to bottom": ["G", "<end>"],
     "sort menu toggle": "s",
     "start search": "/",
+    "filter tags": "t",
     "spawn help": "?",
+    "spawn agenda": "v",
     "copy text": "Y",
     "yank": "y",
     "paste": "p",
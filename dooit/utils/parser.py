@@ -1,42 +1,218 @@
-import appdirs
 import yaml
-import os
-from typing import Dict
+from hashlib import sha256
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
-from os import makedirs
+from dooit.utils.conf_reader import config_man
+from .journal import Journal, Records, apply, diff, flatten, unflatten
+from .snapshot_cache import SnapshotCache, unpack
+from . import serializer
+from .schema import VERSION, get_version
+from .storage import XDG_DATA, Storage, atomic_write, keep_copy
 
-XDG_CONFIG = Path(appdirs.user_config_dir("dooit"))
-XDG_DATA = Path(appdirs.user_data_dir("dooit"))
+USE_JOURNAL = config_man.get("USE_JOURNAL")
+JOURNAL_COMPACT_THRESHOLD = config_man.get("JOURNAL_COMPACT_THRESHOLD")
+FOOTER = "# checksum: "
 
 
-class Parser:
+def add_footer(body: str) -> str:
+    return f"{body}{FOOTER}{sha256(body.encode()).hexdigest()}\n"
+
+
+def check_footer(content: str) -> Tuple[str, bool]:
+    """
+    Splits the footer off the content and validates the checksum
+
+    Files without a footer (older versions, edited by hand) are trusted
+    """
+
+    body, _, footer = content.rstrip("\n").rpartition("\n")
+    if not footer.startswith(FOOTER):
+        return content, True
+
+    body += "\n"
+    checksum = footer[len(FOOTER) :].strip()
+    return body, sha256(body.encode()).hexdigest() == checksum
+
+
+class Parser(Storage):
     """
-    Parser class to manage and parse dooit's config and data
+    Parser class to manage and parse dooit's yaml data
     """
 
     @property
-    def last_modified(self) -> float:
-        return os.stat(self.todo_yaml).st_mtime
+    def files(self) -> List[Path]:
+        return [self.todo_yaml, self.todo_journal]
+
+    @property
+    def digest(self) -> str:
+        """
+        Digest of the data files as last read or written by this instance
+        """
+
+        return sha256(f"{self._digest}:{self.journal.digest}".encode()).hexdigest()
+
+    @property
+    def size(self) -> int:
+        return self._size + self.journal.size
+
+    def __init__(self, use_journal: bool = USE_JOURNAL) -> None:
+        super().__init__()
+        self.use_journal = use_journal
+        self.journal = Journal(self.todo_journal)
+        self.cache = SnapshotCache(self.todo_cache)
+        self._records: Optional[Records] = None
+        self._digest = ""
+        self._size = 0
+
+    def has_changed(self) -> bool:
+        size = sum(i.stat().st_size for i in self.files if i.is_file())
+        if size != self.size:
+            return True
 
-    def __init__(self) -> None:
-        self.check_files()
+        # Same size, compare the actual bytes
+        snapshot = sha256(self.todo_yaml.read_bytes()).hexdigest()
+        journal = b""
+        if self.todo_journal.is_file():
+            journal = self.todo_journal.read_bytes()
+
+        journal = sha256(journal).hexdigest()
+        return sha256(f"{snapshot}:{journal}".encode()).hexdigest() != self.digest
+
+    def track(self, content: bytes) -> None:
+        self._digest = sha256(content).hexdigest()
+        self._size = len(content)
 
     def save(self, data) -> None:
         """
         Save the todos to data file
         """
 
-        with open(self.todo_yaml, "w") as stream:
-            yaml.safe_dump(data, stream, sort_keys=False)
+        self.needs_commit = False
+
+        if not self.use_journal:
+            if self.journal.count:
+                return self.compact(data)
+
+            return self.save_snapshot(data)
+
+        try:
+            records = flatten(data)
+        except (KeyError, TypeError, ValueError):
+            self._records = None
+            return self.compact(data)
+
+        if self._records is None or self.journal.count >= JOURNAL_COMPACT_THRESHOLD:
+            self._records = records
+            return self.compact(data)
+
+        ops = diff(self._records, records)
+        if ops:
+            self.journal.append(ops)
+            self._records = records
+
+    def save_snapshot(self, data) -> None:
+        """
+        Rewrites the whole data file
+        """
+
+        content = add_footer(serializer.dump(data)).encode()
+        atomic_write(self.todo_yaml, content, backup=self.todo_backup)
+        self.track(content)
+        self.update_cache(data)
+
+    def update_cache(self, data) -> None:
+        if get_version(data) != VERSION:
+            # Snapshots in older formats are not cached
+            return self.cache.clear()
+
+        try:
+            self.cache.save(self.cache.key(self.todo_yaml, self._digest), data)
+        except (OSError, KeyError, TypeError, ValueError):
+            # Only slows down the next startup
+            self.cache.clear()
+
+    def compact(self, data) -> None:
+        """
+        Folds the journal into a fresh snapshot
+        """
+
+        self.save_snapshot(data)
+        self.journal.clear()
 
     def load(self) -> Dict:
         """
         Retrieves the todos from data file
         """
 
-        with open(self.todo_yaml, "r") as stream:
-            data = yaml.safe_load(stream)
+        content = self.todo_yaml.read_bytes()
+        self.track(content)
+
+        data = self.cache.load(self.cache.key(self.todo_yaml, self._digest))
+        if data is not None:
+            return self.replay(data)
+
+        ok, data = self.read_snapshot(content)
+        if ok:
+            self.update_cache(data)
+        else:
+            # Keep the broken file around so nothing gets lost for good
+            keep_copy(self.todo_yaml, self.todo_corrupt)
+            if self.todo_backup.is_file():
+                _, data = self.read_snapshot(self.todo_backup.read_bytes())
+
+        return self.replay(data)
+
+    def read_snapshot(self, content: bytes) -> Tuple[bool, Any]:
+        """
+        Parses a snapshot, returns whether it was intact along with the data
+        """
+
+        try:
+            body, ok = check_footer(content.decode())
+        except UnicodeDecodeError:
+            return False, {}
 
+        if not ok:
+            return False, {}
+
+        try:
+            return True, serializer.load(body)
+        except yaml.YAMLError:
+            return False, {}
+
+    def replay(self, data) -> Dict:
+        """
+        Applies the journal on top of the loaded snapshot
+        """
+
+        self._records = None
+        ops = self.journal.replay()
+
+        if isinstance(data, tuple):
+            # Packed data from the cache, the models can read it as is
+            if not (ops or self.use_journal):
+                return data
+
+            data = unpack(data)
+
+        if data and get_version(data) != VERSION:
+            # Snapshots in older formats are rewritten right after loading
+            self.needs_commit = True
+            return data
+
+        if not (ops or self.use_journal):
+            return data
+
+        try:
+            records = flatten(data)
+        except (KeyError, TypeError, ValueError):
+            return data
+
+        if ops:
+            apply(records, ops)
+            data = unflatten(records)
+
+        self._records = records
         return data
 
     def check_files(self) -> None:
@@ -45,16 +221,14 @@ class Parser:
         to avoid any errors
         """
 
-        makedirs(XDG_CONFIG, exist_ok=True)
-        makedirs(XDG_DATA, exist_ok=True)
+        super().check_files()
 
         self.todo_yaml = XDG_DATA / "todo.yaml"
-        self.config_file = XDG_CONFIG / "config.py"
+        self.todo_journal = XDG_DATA / "todo.journal"
+        self.todo_backup = XDG_DATA / "todo.yaml.bak"
+        self.todo_corrupt = XDG_DATA / "todo.yaml.corrupt"
+        self.todo_cache = XDG_DATA / "todo.cache"
 
         if not Path.is_file(self.todo_yaml):
             with open(self.todo_yaml, "w") as f:
                 yaml.safe_dump(dict(), f)
-
-        if not Path.is_file(self.config_file):
-            with open(self.config_file, "w") as f:
-                pass
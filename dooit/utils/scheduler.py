@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from dooit.utils.conf_reader import config_man
+
+SAVE_DELAY = config_man.get("SAVE_DELAY")
+log = logging.getLogger(__name__)
+
+
+class SaveScheduler:
+    """
+    Coalesces bursts of save requests and writes the data off the event loop
+
+    The snapshot is taken on the loop when the window closes, only the
+    serialization and file I/O happen in the worker thread
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[], Any],
+        save: Callable[[Any], None],
+        delay: float = SAVE_DELAY,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> None:
+        self.snapshot = snapshot
+        self.save = save
+        self.delay = delay
+        self.on_error = on_error
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Optional[Future] = None
+
+        # A single worker keeps the writes in order
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def is_pending(self) -> bool:
+        """
+        Returns True if there are changes which are not written yet
+        """
+
+        return self._timer is not None or bool(
+            self._inflight and not self._inflight.done()
+        )
+
+    def request(self) -> None:
+        """
+        Schedules a save, requests within the window are merged into one
+        """
+
+        if self._timer is not None:
+            return
+
+        if self.delay <= 0:
+            return self._fire()
+
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(self.delay, self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        self._loop = asyncio.get_running_loop()
+        self._inflight = self._executor.submit(self.save, self.snapshot())
+        self._inflight.add_done_callback(self._check_error)
+
+    def _check_error(self, future: Future) -> None:
+        # Called from the worker, hand the error back to the loop
+        error = future.exception()
+        if error and self.on_error:
+            self._loop.call_soon_threadsafe(self.on_error, error)
+
+    def flush(self) -> None:
+        """
+        Writes the current state right away and waits for it to finish,
+        failures are logged as this happens on the way out
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        future = self._executor.submit(self.save, self.snapshot())
+        if error := future.exception():
+            log.error("Could not save: %s", error, exc_info=error)
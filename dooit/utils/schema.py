@@ -0,0 +1,45 @@
+"""
+Layout of the stored data
+
+Version 3 keeps every workspace and todo as a dict with short keys,
+fields holding their default value are left out:
+
+    {"version": 3, "workspaces": [{"u": ..., "d": ..., "c": [...], "w": [...]}]}
+
+Version 2 was a list of workspaces with long keys and every field written out,
+version 1 a dict keyed by workspace descriptions with todo.txt like strings
+"""
+
+from typing import Any, Dict, List
+
+VERSION = 3
+
+UUID = "u"
+DESCRIPTION = "d"
+STATUS = "s"  # 1 when completed
+URGENCY = "p"  # 1 to 4
+DUE = "t"  # seconds since the epoch
+EFFORT = "e"
+RECURRENCE = "r"
+SORT_MODE = "o"  # like "urgency,-due", only for workspaces
+TODOS = "c"
+WORKSPACES = "w"
+
+TODO_FIELDS = [STATUS, URGENCY, DESCRIPTION, DUE, EFFORT, RECURRENCE]
+
+# Only used in memory, marks workspaces whose todos were not loaded from storage yet
+DEFERRED = "deferred"
+
+
+def wrap(workspaces: List) -> Dict[str, Any]:
+    return {"version": VERSION, "workspaces": workspaces}
+
+
+def get_version(data: Any) -> int:
+    if isinstance(data, list):
+        return 2
+
+    if isinstance(data, dict) and "version" in data:
+        return data["version"]
+
+    return 1
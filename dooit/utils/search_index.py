@@ -0,0 +1,598 @@
+from collections import defaultdict
+from heapq import heappush, heappushpop
+from itertools import count
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+# Scores in the fashion of fzf
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = SCORE_MATCH // 2
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+# Number of queries whose matches are kept to narrow down the next ones
+CACHED_QUERIES = 64
+
+# Candidates scored at most for a limited number of results, the ones which
+# could score the highest go first
+MAX_SCORED = 2000
+
+
+class Match(NamedTuple):
+    model: Any
+    score: int
+    positions: Sequence[int]
+
+
+class Matches(List[Match]):
+    """
+    Results of a search, `truncated` is set if some candidates were left
+    out which might have made it to the results
+    """
+
+    truncated = False
+
+
+def ngrams(text: str, size: int) -> Set[str]:
+    """
+    Substrings of the given size within the words of the text
+    """
+
+    return {
+        word[i : i + size] for word in text.split() for i in range(len(word) - size + 1)
+    }
+
+
+def text_grams(text: str) -> Set[str]:
+    return ngrams(text, 2) | ngrams(text, 3)
+
+
+def start_grams(text: str) -> Set[str]:
+    """
+    The first one and two characters at every position where a match
+    earns the boundary bonus, see `score_window`
+    """
+
+    grams = set()
+    for word in text.split():
+        grams.add(word[0])
+        grams.add(word[:2])
+        if word.isalnum():
+            continue
+
+        for i in range(1, len(word)):
+            if not (word[i].isalnum() and word[i - 1].isalnum()):
+                grams.add(word[i])
+                grams.add(word[i : i + 2])
+
+    return grams
+
+
+def intersect(sets: List[Set[str]]) -> Set[str]:
+    if not sets:
+        return set()
+
+    sets.sort(key=len)
+    result = set(sets[0])
+    for i in sets[1:]:
+        result &= i
+
+    return result
+
+
+def score_window(pattern: str, text: str, start: int) -> Tuple[int, List[int]]:
+    """
+    Scores the pattern matched from left to right starting at `text[start]`,
+    consecutive characters and characters at the start of a word score higher
+    while gaps in between cost
+    """
+
+    score = 0
+    positions = []
+    consecutive = 0
+    first_bonus = 0
+    prev = start - 1
+
+    for index, char in enumerate(pattern):
+        pos = text.find(char, prev + 1)
+        if index and pos > prev + 1:
+            score += SCORE_GAP_START + (pos - prev - 2) * SCORE_GAP_EXTENSION
+            consecutive = 0
+
+        word = char.isalnum()
+        prev_word = pos > 0 and text[pos - 1].isalnum()
+        bonus = BONUS_BOUNDARY if not (word and prev_word) else 0
+        if consecutive == 0:
+            first_bonus = bonus
+        else:
+            if bonus >= BONUS_BOUNDARY and bonus > first_bonus:
+                first_bonus = bonus
+            bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+
+        if index == 0:
+            bonus *= BONUS_FIRST_CHAR_MULTIPLIER
+
+        score += SCORE_MATCH + bonus
+        positions.append(pos)
+        consecutive += 1
+        prev = pos
+
+    return score, positions
+
+
+def is_subsequence(pattern: str, text: str) -> bool:
+    end = -1
+    for char in pattern:
+        end = text.find(char, end + 1)
+        if end < 0:
+            return False
+
+    return True
+
+
+def fuzzy_match(pattern: str, text: str) -> Optional[Tuple[int, List[int]]]:
+    """
+    Matches the characters of the pattern in order anywhere in the text,
+    returns the score along with the matched positions
+    """
+
+    end = -1
+    for char in pattern:
+        end = text.find(char, end + 1)
+        if end < 0:
+            return
+
+    # Walk back from the end of the first match to find the shortest window
+    start = end + 1
+    for char in reversed(pattern):
+        start = text.rfind(char, 0, start)
+
+    return score_window(pattern, text, start)
+
+
+class Pattern:
+    """
+    A word of the query
+
+    Most descriptions contain the word as is, the score of such a match only
+    depends on whether it starts a word so both are worked out up front.
+    Scattered matches have at least one gap, they can't score higher than
+    the word at the start of a word minus the gap
+    """
+
+    def __init__(self, word: str) -> None:
+        self.word = word
+        self.size = len(word)
+        self.boundary_score = score_window(word, word, 0)[0]
+        self.inner_score = score_window(word, f"x{word}", 1)[0]
+        self.fuzzy_bound = self.boundary_score + SCORE_GAP_START
+
+        # The highest scores possible with the first two characters of the word
+        # at a boundary, with just the first one and with neither of them
+        self.bounds = (
+            self.boundary_score,
+            self.fuzzy_bound,
+            max(
+                self.inner_score,
+                self.fuzzy_bound - BONUS_BOUNDARY * BONUS_FIRST_CHAR_MULTIPLIER,
+            ),
+        )
+
+    def find(self, text: str) -> Optional[Tuple[int, Optional[Sequence[int]]]]:
+        """
+        Scores the word found as is, scattered matches only get an upper bound
+        of their score and no positions
+        """
+
+        word = self.word
+        start = text.find(word)
+        if start < 0:
+            if is_subsequence(word, text):
+                return self.fuzzy_bound, None
+            return
+
+        first = start
+        while start > 0 and text[start - 1].isalnum():
+            start = text.find(word, start + 1)
+            if start < 0:
+                return self.inner_score, range(first, first + self.size)
+
+        return self.boundary_score, range(start, start + self.size)
+
+    def match(self, text: str) -> Optional[Tuple[int, Sequence[int]]]:
+        result = self.find(text)
+        if result is None:
+            return
+
+        score, positions = result
+        if positions is None:
+            return fuzzy_match(self.word, text)
+
+        return score, positions
+
+
+def find_patterns(
+    patterns: List[Pattern], text: str
+) -> Optional[Tuple[int, Optional[Sequence[int]]]]:
+    """
+    Finds every word of the query on its own, the scores add up.
+    The positions are left out if any of the words is scattered
+    """
+
+    if len(patterns) == 1:
+        return patterns[0].find(text)
+
+    score = 0
+    positions: Optional[Set[int]] = set()
+    for pattern in patterns:
+        result = pattern.find(text)
+        if result is None:
+            return
+
+        score += result[0]
+        if positions is not None and result[1] is not None:
+            positions.update(result[1])
+        else:
+            positions = None
+
+    return score, None if positions is None else sorted(positions)
+
+
+def match_patterns(patterns: List[Pattern], text: str) -> Tuple[int, List[int]]:
+    """
+    Scores a text known to match all the words of the query
+    """
+
+    if len(patterns) == 1:
+        # Lone words only get here when scattered
+        result = fuzzy_match(patterns[0].word, text)
+        assert result is not None
+        return result
+
+    score = 0
+    positions: Set[int] = set()
+    for pattern in patterns:
+        result = pattern.match(text)
+        assert result is not None
+
+        score += result[0]
+        positions.update(result[1])
+
+    return score, sorted(positions)
+
+
+def sorted_results(best: List[Tuple]) -> List[Tuple]:
+    """
+    Turns the entries of the heap kept by `SearchIndex.score_best`
+    into results, best first
+    """
+
+    return sorted(
+        (-score, -order, uuid, positions) for score, order, uuid, positions in best
+    )
+
+
+class SearchIndex:
+    """
+    Index of the descriptions of a set of models for fuzzy searching
+
+    Descriptions containing the words of the query as they are score the
+    highest, the index of trigrams (bigrams for words of two characters)
+    narrows them down to the ones with every trigram of every word. Scattered
+    matches are looked for among the descriptions with every character of
+    the query.
+
+    With a limit, the candidates are scored in the order of the highest score
+    they could get, which the characters at the boundaries of words tell,
+    until none of the rest could make it to the results. At most `MAX_SCORED`
+    of them are scored. The matches of recent queries are kept as well:
+    a query which extends one of them only has to look through its matches
+    """
+
+    def __init__(self, models: Iterable[Any] = ()) -> None:
+        self.models: Dict[str, Any] = {}
+        self.texts: Dict[str, str] = {}
+        self.order: Dict[str, int] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.starts: Dict[str, Set[str]] = defaultdict(set)
+        self._counter = count()
+
+        # Bumped on every change, the cached matches are dropped once it moves
+        self.version = 0
+        self._cache: Dict[str, List[str]] = {}
+        self._cache_version = 0
+
+        for i in models:
+            self.add(i)
+
+    def add(self, model: Any) -> None:
+        uuid = model.uuid
+        if uuid in self.models:
+            return self.update(model)
+
+        text = model.description.lower()
+        self.models[uuid] = model
+        self.texts[uuid] = text
+        self.order[uuid] = next(self._counter)
+        for i in set(text):
+            self.postings[i].add(uuid)
+        for i in text_grams(text):
+            self.grams[i].add(uuid)
+        for i in start_grams(text):
+            self.starts[i].add(uuid)
+
+        self.version += 1
+
+    def update(self, model: Any) -> None:
+        """
+        Indexes the description of the model again after it changed
+        """
+
+        uuid = model.uuid
+        old = self.texts.get(uuid)
+        if old is None:
+            return self.add(model)
+
+        text = model.description.lower()
+        if text == old:
+            return
+
+        self.models[uuid] = model
+        self.texts[uuid] = text
+        for postings, split in (
+            (self.postings, set),
+            (self.grams, text_grams),
+            (self.starts, start_grams),
+        ):
+            old_keys, new_keys = split(old), split(text)
+            for i in old_keys - new_keys:
+                self._unpost(postings, i, uuid)
+            for i in new_keys - old_keys:
+                postings[i].add(uuid)
+
+        self.version += 1
+
+    def discard(self, model: Any) -> None:
+        uuid = model.uuid
+        if (text := self.texts.pop(uuid, None)) is None:
+            return
+
+        del self.models[uuid]
+        del self.order[uuid]
+        for i in set(text):
+            self._unpost(self.postings, i, uuid)
+        for i in text_grams(text):
+            self._unpost(self.grams, i, uuid)
+        for i in start_grams(text):
+            self._unpost(self.starts, i, uuid)
+
+        self.version += 1
+
+    def _unpost(self, postings: Dict[str, Set[str]], key: str, uuid: str) -> None:
+        if posting := postings.get(key):
+            posting.discard(uuid)
+            if not posting:
+                del postings[key]
+
+    def exact_candidates(self, words: List[str]) -> Set[str]:
+        """
+        Uuids which might contain every word of the query as it is
+        """
+
+        sets = []
+        for word in words:
+            if len(word) == 1:
+                sets.append(self.postings.get(word, set()))
+            else:
+                size = min(len(word), 3)
+                sets.extend(self.grams.get(i, set()) for i in ngrams(word, size))
+
+        return intersect(sets)
+
+    def candidates(self, query: str) -> Iterable[str]:
+        """
+        Uuids which might match the query
+        """
+
+        if self._cache_version != self.version:
+            self._cache.clear()
+            self._cache_version = self.version
+
+        # Whatever matches a query also matches all of its prefixes
+        for i in range(len(query), 0, -1):
+            if (uuids := self._cache.get(query[:i])) is not None:
+                return uuids
+
+        return intersect(
+            [self.postings.get(i, set()) for i in set(query) if not i.isspace()]
+        )
+
+    def group_by_bound(
+        self, patterns: List[Pattern], uuids: Set[str], most: int
+    ) -> Dict[int, Set[str]]:
+        """
+        Splits the uuids by the highest score they could get, but `most`
+        """
+
+        groups = {0: uuids}
+        for pattern in patterns:
+            word = pattern.word
+            top, middle, low = pattern.bounds
+            split: Dict[int, Set[str]] = {}
+
+            def add(bound: int, part: Set[str]) -> None:
+                if bound in split:
+                    split[bound] |= part
+                elif part:
+                    split[bound] = part
+
+            # Characters at a boundary start the two at the same spot as well
+            one = self.starts.get(word[0], set())
+            for bound, group in groups.items():
+                at_one = group & one
+                if len(word) > 1:
+                    at_two = at_one & self.starts.get(word[:2], set())
+                    add(bound + top, at_two)
+                    add(bound + middle, at_one - at_two)
+                else:
+                    add(bound + top, at_one)
+                add(bound + low, group - at_one)
+
+            groups = split
+
+        capped: Dict[int, Set[str]] = {}
+        for bound, group in groups.items():
+            bound = min(bound, most)
+            if bound in capped:
+                capped[bound] |= group
+            else:
+                capped[bound] = group
+
+        return capped
+
+    def in_order(self, uuids: Set[str]) -> Iterable[str]:
+        """
+        The uuids in the order they were indexed in
+        """
+
+        if len(uuids) * 8 < len(self.texts):
+            return sorted(uuids, key=self.order.__getitem__)
+
+        return (i for i in self.texts if i in uuids)
+
+    def search(self, query: str, limit: Optional[int] = None) -> Matches:
+        """
+        Returns the models which fuzzy match all the words of the query,
+        best matches first
+        """
+
+        query = query.lower()
+        words = query.split()
+        if not words:
+            models = list(self.models.values())[:limit]
+            return Matches(Match(i, 0, []) for i in models)
+
+        patterns = [Pattern(i) for i in words]
+        exact = self.exact_candidates(words)
+        if limit is None:
+            rest = set(self.candidates(query)) - exact
+            results, found = self.score_all(patterns, exact | rest)
+            truncated = False
+        else:
+            results, found, truncated = self.score_best(patterns, query, exact, limit)
+
+        if found is not None:
+            if len(self._cache) >= CACHED_QUERIES:
+                self._cache.clear()
+            self._cache[query] = found
+
+        matches = Matches(Match(self.models[i], -j, k) for j, _, i, k in results)
+        matches.truncated = truncated
+        return matches
+
+    def score_all(
+        self, patterns: List[Pattern], uuids: Iterable[str]
+    ) -> Tuple[List[Tuple], List[str]]:
+        """
+        Scores every candidate, returns the sorted results and the matching uuids
+        """
+
+        texts, order = self.texts, self.order
+        found = []
+        results = []
+        for uuid in uuids:
+            if result := find_patterns(patterns, texts[uuid]):
+                found.append(uuid)
+                score, positions = result
+                if positions is None:
+                    score, positions = match_patterns(patterns, texts[uuid])
+
+                results.append((-score, order[uuid], uuid, positions))
+
+        results.sort()
+        return results, found
+
+    def score_best(
+        self, patterns: List[Pattern], query: str, exact: Set[str], limit: int
+    ) -> Tuple[List[Tuple], Optional[List[str]], bool]:
+        """
+        Scores the candidates which could score the highest first, returns the
+        best `limit` results, the matching uuids if all the candidates were
+        scored and whether any were left out that could have made it
+        """
+
+        # A description missing any of the words as it is scores lower than
+        # the words found at the start of words, minus a gap
+        boundary = sum(i.boundary_score for i in patterns)
+        scattered = boundary + SCORE_GAP_START
+        groups = self.group_by_bound(patterns, exact, boundary)
+        rest: Optional[Set[str]] = None
+
+        texts, order = self.texts, self.order
+        found: Optional[List[str]] = []
+        # The worst of the best results on top, as (score, -order, uuid, positions)
+        best: List[Tuple] = []
+        scored = 0
+
+        def could_make_it(score: int, uuid: str) -> bool:
+            return len(best) < limit or (score, -order[uuid]) > best[0][:2]
+
+        while True:
+            if rest is None and max(groups, default=scattered) <= scattered:
+                # The scattered ones are only looked up once they could make it
+                if len(best) < limit or best[0][0] >= scattered:
+                    rest = set(self.candidates(query)) - exact
+                    for bound, group in self.group_by_bound(
+                        patterns, rest, scattered
+                    ).items():
+                        groups.setdefault(bound, set()).update(group)
+                else:
+                    rest, found = set(), None
+
+            if not groups:
+                break
+
+            bound = max(groups)
+            for uuid in self.in_order(groups.pop(bound)):
+                if not could_make_it(bound, uuid):
+                    # Neither can the ones after, they are as late or score less
+                    return sorted_results(best), None, False
+
+                if scored == MAX_SCORED:
+                    return sorted_results(best), None, True
+
+                scored += 1
+                if not (result := find_patterns(patterns, texts[uuid])):
+                    continue
+
+                if found is not None:
+                    found.append(uuid)
+
+                score, positions = result
+                if positions is None:
+                    # The score is an upper bound for scattered matches
+                    if not could_make_it(score, uuid):
+                        continue
+
+                    score, positions = match_patterns(patterns, texts[uuid])
+
+                if could_make_it(score, uuid):
+                    entry = (score, -order[uuid], uuid, positions)
+                    if len(best) < limit:
+                        heappush(best, entry)
+                    else:
+                        heappushpop(best, entry)
+
+        return sorted_results(best), found, False
@@ -0,0 +1,59 @@
+import yaml
+from typing import Any, Tuple, Type, Union
+
+try:
+    from yaml import CSafeDumper, CSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    CSafeDumper = CSafeLoader = None
+
+ENGINES = {
+    "python": (yaml.SafeLoader, yaml.SafeDumper),
+}
+if CSafeLoader and CSafeDumper:
+    ENGINES["libyaml"] = (CSafeLoader, CSafeDumper)
+
+# The C engine produces the same documents and is many times faster
+ENGINE = "libyaml" if "libyaml" in ENGINES else "python"
+
+
+def get_engine(engine: str = ENGINE) -> Tuple[Type, Type]:
+    return ENGINES[engine]
+
+
+def load(content: Union[str, bytes], engine: str = ENGINE) -> Any:
+    """
+    Parses a yaml document
+    """
+
+    loader, _ = get_engine(engine)
+    try:
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError:
+        if engine == "python":
+            raise
+
+        # libyaml is stricter about a few inputs the python parser accepts
+        return load(content, "python")
+
+
+def dump(data: Any, engine: str = ENGINE) -> str:
+    """
+    Serializes the data to a yaml document
+    """
+
+    _, dumper = get_engine(engine)
+    return yaml.dump(data, Dumper=dumper, sort_keys=False)
+
+
+def round_trips(data: Any) -> bool:
+    """
+    Checks that every engine reads back what any engine wrote
+    """
+
+    for writer in ENGINES:
+        content = dump(data, writer)
+        for reader in ENGINES:
+            if load(content, reader) != data:
+                return False
+
+    return True
@@ -0,0 +1,156 @@
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from . import serializer
+from .schema import (
+    DEFERRED,
+    DESCRIPTION,
+    SORT_MODE,
+    TODOS,
+    UUID,
+    VERSION,
+    WORKSPACES,
+    wrap,
+)
+from .storage import XDG_DATA, Storage, atomic_write
+
+
+def collect_todos(workspace: Dict, todos: Dict[str, List]) -> Dict[str, List]:
+    """
+    Collects the todos of a workspace and its children keyed by their uuids
+    """
+
+    if workspace.get(TODOS):
+        todos[workspace[UUID]] = workspace[TODOS]
+
+    for i in workspace.get(WORKSPACES, []):
+        collect_todos(i, todos)
+
+    return todos
+
+
+def get_header(workspace: Dict) -> Dict:
+    """
+    Strips the todos off a workspace and its children
+    """
+
+    header = {UUID: workspace[UUID], DESCRIPTION: workspace[DESCRIPTION]}
+    if sort_mode := workspace.get(SORT_MODE):
+        header[SORT_MODE] = sort_mode
+    if workspaces := workspace.get(WORKSPACES):
+        header[WORKSPACES] = [get_header(i) for i in workspaces]
+
+    return header
+
+
+class ShardedStorage(Storage):
+    """
+    Storage backend keeping the todos of every top-level workspace in a file
+    of its own, next to an index of all the workspaces
+
+    Only the index is read on startup, the todos of a workspace are read once
+    it is opened. Saving rewrites just the files of the changed workspaces
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.shards_dir = path or XDG_DATA / "shards"
+        super().__init__()
+        self.index = self.shards_dir / "index.yaml"
+
+        # Digests of the shard files as listed in the index
+        self._shards: Dict[str, str] = {}
+
+        # Fragments written last, unchanged fragments are the same objects
+        self._saved: Dict[str, Any] = {}
+        self._digest = ""
+
+    @property
+    def files(self) -> List[Path]:
+        # Every save rewrites the index, watching it is enough
+        return [self.index]
+
+    def shard_path(self, uuid: str) -> Path:
+        return self.shards_dir / f"{uuid}.yaml"
+
+    def has_changed(self) -> bool:
+        if not self.index.is_file():
+            return False
+
+        return sha256(self.index.read_bytes()).hexdigest() != self._digest
+
+    def load(self) -> Any:
+        if not self.index.is_file():
+            return self.migrate()
+
+        content = self.index.read_bytes()
+        self._digest = sha256(content).hexdigest()
+        self._saved.clear()
+
+        data = serializer.load(content) or {}
+        self._shards = dict(data.get("shards", {}))
+        return wrap(
+            [{**i, DEFERRED: True} for i in data.get("workspaces", [])],
+        )
+
+    def load_todos(self, uuid: str) -> Dict[str, List]:
+        path = self.shard_path(uuid)
+        if not path.is_file():
+            return {}
+
+        data = serializer.load(path.read_bytes()) or {}
+        return data.get("todos", {})
+
+    def migrate(self) -> Any:
+        """
+        Loads the data from `todo.yaml` in case there is no index yet
+        """
+
+        from .parser import Parser
+
+        data = Parser(use_journal=False).load()
+        self.needs_commit = bool(data)
+        return data
+
+    def save(self, data: Dict) -> None:
+        self.needs_commit = False
+
+        shards: Dict[str, str] = {}
+        for workspace in data["workspaces"]:
+            uuid = workspace[UUID]
+            if workspace.get(DEFERRED) or self._saved.get(uuid) is workspace:
+                if uuid in self._shards:
+                    shards[uuid] = self._shards[uuid]
+                continue
+
+            content = serializer.dump(
+                {"version": VERSION, "todos": collect_todos(workspace, {})}
+            ).encode()
+
+            digest = sha256(content).hexdigest()[:16]
+            if self._shards.get(uuid) != digest:
+                atomic_write(self.shard_path(uuid), content)
+
+            shards[uuid] = digest
+            self._saved[uuid] = workspace
+
+        # Written last so that it only refers to shards on disk
+        index = {
+            "version": VERSION,
+            "shards": shards,
+            "workspaces": [get_header(i) for i in data["workspaces"]],
+        }
+        content = serializer.dump(index).encode()
+        digest = sha256(content).hexdigest()
+        if digest != self._digest:
+            atomic_write(self.index, content)
+            self._digest = digest
+
+        for uuid in self._shards.keys() - shards.keys():
+            self.shard_path(uuid).unlink(missing_ok=True)
+            self._saved.pop(uuid, None)
+
+        self._shards = shards
+
+    def check_files(self) -> None:
+        super().check_files()
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
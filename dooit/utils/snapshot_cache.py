@@ -0,0 +1,120 @@
+import marshal
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from .schema import (
+    DESCRIPTION,
+    SORT_MODE,
+    TODO_FIELDS,
+    TODOS,
+    UUID,
+    WORKSPACES,
+    wrap,
+)
+from .storage import atomic_write
+
+# Bump when the packed layout changes
+CACHE_VERSION = 3
+PACKED_TODO_FIELDS = [UUID, *TODO_FIELDS]
+
+Key = Tuple[int, int, str]
+
+
+def pack_todo(todo: Dict) -> Tuple:
+    values = [todo.get(i) for i in PACKED_TODO_FIELDS]
+    return (*values, tuple(pack_todo(i) for i in todo.get(TODOS, [])))
+
+
+def pack_workspace(workspace: Dict) -> Tuple:
+    return (
+        workspace[UUID],
+        workspace[DESCRIPTION],
+        workspace.get(SORT_MODE, ""),
+        tuple(pack_todo(i) for i in workspace.get(TODOS, [])),
+        tuple(pack_workspace(i) for i in workspace.get(WORKSPACES, [])),
+    )
+
+
+def pack(data: Dict) -> Tuple:
+    """
+    Converts the commit data to nested tuples, which load much faster
+    than dicts and can be read by the models directly
+
+    Missing fields are stored as None
+    """
+
+    return tuple(pack_workspace(i) for i in data["workspaces"])
+
+
+def unpack_todo(packed: Tuple) -> Dict:
+    *values, children = packed
+    todo = {i: j for i, j in zip(PACKED_TODO_FIELDS, values) if j is not None}
+    if children:
+        todo[TODOS] = [unpack_todo(i) for i in children]
+
+    return todo
+
+
+def unpack_workspace(packed: Tuple) -> Dict:
+    uuid, description, sort_mode, todos, workspaces = packed
+    workspace = {UUID: uuid, DESCRIPTION: description}
+    if sort_mode:
+        workspace[SORT_MODE] = sort_mode
+    if todos:
+        workspace[TODOS] = [unpack_todo(i) for i in todos]
+
+    if workspaces:
+        workspace[WORKSPACES] = [unpack_workspace(i) for i in workspaces]
+
+    return workspace
+
+
+def unpack(packed: Tuple) -> Dict:
+    """
+    Converts packed data back to the commit data
+    """
+
+    return wrap([unpack_workspace(i) for i in packed])
+
+
+class SnapshotCache:
+    """
+    Packed copy of the parsed data file, skips parsing yaml on startup
+
+    The cache is only used while the key (size, mtime and digest of the
+    data file) matches the one it was written for
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @staticmethod
+    def key(path: Path, digest: str) -> Key:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns, digest
+
+    def load(self, key: Key) -> Optional[Tuple]:
+        """
+        Returns the packed data, or None if the cache is missing or stale
+        """
+
+        try:
+            content = self.path.read_bytes()
+            version, marshal_version, cached_key, packed = marshal.loads(content)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if (version, marshal_version) != (CACHE_VERSION, marshal.version):
+            return None
+
+        if tuple(cached_key) != key:
+            return None
+
+        return packed
+
+    def save(self, key: Key, data: Any) -> None:
+        packed = pack(data)
+        content = marshal.dumps((CACHE_VERSION, marshal.version, key, packed))
+        atomic_write(self.path, content)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
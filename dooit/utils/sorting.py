@@ -0,0 +1,174 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Field to sort by and whether it is sorted in descending order
+SortKey = Tuple[str, bool]
+
+
+def get_sort_order(
+    models: Sequence[Any], keys: Sequence[SortKey], now: Optional[datetime] = None
+) -> List[int]:
+    """
+    Returns the positions of the models in the order sorting them by the keys
+    would put them, the first key deciding first
+
+    The sort values of every key are computed once per model, all of them as
+    of the same `now`. Models which compare equal keep their order
+    """
+
+    now = now or datetime.now()
+    order = list(range(len(models)))
+
+    # Sorts are stable, sorting by the last key first leaves the first one on top
+    for field, reverse in reversed(keys):
+        attr = f"_{field}"
+        values = [getattr(i, attr).get_sortable(now) for i in models]
+        order.sort(key=values.__getitem__, reverse=reverse)
+
+    return order
+
+
+def parse_sort_keys(keys: str) -> List[SortKey]:
+    """
+    Parses keys written like `urgency,-due`, a leading `-` sorts descending
+    """
+
+    return [
+        (i.strip().lstrip("-"), i.strip().startswith("-"))
+        for i in keys.split(",")
+        if i.strip()
+    ]
+
+
+def format_sort_keys(keys: Sequence[SortKey]) -> str:
+    return ",".join(("-" if reverse else "") + field for field, reverse in keys)
+
+
+class Descending:
+    """
+    Wraps a sort value to compare the other way round
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __lt__(self, other: "Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Descending) and self.value == other.value
+
+
+class SortedView:
+    """
+    Models kept in the order of the sort keys as they are added, removed or
+    changed, every change moves a single model found by binary search
+
+    Each model is kept along with its sort values as they were last worked out,
+    `update` has to be called once they might have changed
+    """
+
+    def __init__(
+        self,
+        models: Sequence[Any],
+        sort_keys: Sequence[SortKey],
+        now: Optional[datetime] = None,
+    ) -> None:
+        self.sort_keys = list(sort_keys)
+
+        now = now or datetime.now()
+        keys = [self.get_key(i, now) for i in models]
+        order = sorted(range(len(models)), key=keys.__getitem__)
+
+        self.keys = [keys[i] for i in order]
+        self.models = [models[i] for i in order]
+        self.key_of: Dict[str, Tuple] = {i.uuid: j for i, j in zip(models, keys)}
+
+    def get_key(self, model: Any, now: Optional[datetime] = None) -> Tuple:
+        now = now or datetime.now()
+
+        key = []
+        for field, reverse in self.sort_keys:
+            value = getattr(model, f"_{field}").get_sortable(now)
+            key.append(Descending(value) if reverse else value)
+
+        return tuple(key)
+
+    def insert(self, model: Any, key: Optional[Tuple] = None) -> int:
+        """
+        Puts the model after the ones which sort the same, returns its index
+        """
+
+        key = key or self.get_key(model)
+        index = bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.models.insert(index, model)
+        self.key_of[model.uuid] = key
+        return index
+
+    def remove(self, model: Any) -> int:
+        """
+        Takes the model out, returns the index it had or -1 if it wasn't there
+        """
+
+        key = self.key_of.pop(model.uuid, None)
+        if key is None:
+            return -1
+
+        index = bisect_left(self.keys, key)
+        while self.models[index] is not model:
+            index += 1
+
+        del self.keys[index]
+        del self.models[index]
+        return index
+
+    def update(self, model: Any) -> bool:
+        """
+        Moves the model to its place after its sort values changed,
+        returns whether it moved
+        """
+
+        old = self.key_of.get(model.uuid)
+        if old is None:
+            return False
+
+        key = self.get_key(model)
+        if key == old:
+            return False
+
+        index = self.remove(model)
+        return self.insert(model, key) != index
+
+
+def get_unmoved(positions: Sequence[int]) -> Set[int]:
+    """
+    Returns the indexes of the longest run of increasing positions,
+    which is what can stay in place when putting the items at their positions
+    """
+
+    # Smallest last position of the runs of every length, with their item
+    tails: List[int] = []
+    tail_indexes: List[int] = []
+    previous: List[int] = []
+    for index, position in enumerate(positions):
+        length = bisect_left(tails, position)
+        if length == len(tails):
+            tails.append(position)
+            tail_indexes.append(index)
+        else:
+            tails[length] = position
+            tail_indexes[length] = index
+
+        previous.append(tail_indexes[length - 1] if length else -1)
+
+    unmoved = set()
+    index = tail_indexes[-1] if tail_indexes else -1
+    while index != -1:
+        unmoved.add(index)
+        index = previous[index]
+
+    return unmoved
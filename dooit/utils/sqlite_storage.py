@@ -0,0 +1,221 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from .journal import Operation, Records, diff, flatten, unflatten
+from .schema import (
+    DESCRIPTION,
+    DUE,
+    EFFORT,
+    RECURRENCE,
+    SORT_MODE,
+    STATUS,
+    URGENCY,
+)
+from .storage import XDG_DATA, Storage
+
+SCHEMA_VERSION = 3
+
+# Columns of each table along with the field they store, NULL means the default
+TABLES = {
+    "workspace": ("workspaces", {"description": DESCRIPTION, "sort": SORT_MODE}),
+    "todo": (
+        "todos",
+        {
+            "status": STATUS,
+            "urgency": URGENCY,
+            "description": DESCRIPTION,
+            "due": DUE,
+            "effort": EFFORT,
+            "recurrence": RECURRENCE,
+        },
+    ),
+}
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workspaces (
+    uuid TEXT PRIMARY KEY,
+    parent TEXT,
+    after TEXT,
+    description,
+    sort
+);
+
+CREATE TABLE IF NOT EXISTS todos (
+    uuid TEXT PRIMARY KEY,
+    parent TEXT,
+    after TEXT,
+    status,
+    urgency,
+    description,
+    due,
+    effort,
+    recurrence
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+
+CREATE INDEX IF NOT EXISTS workspaces_parent ON workspaces (parent);
+CREATE INDEX IF NOT EXISTS todos_parent ON todos (parent);
+"""
+
+
+class SqliteStorage(Storage):
+    """
+    Storage backend keeping every workspace and todo as a row in a sqlite database
+    """
+
+    keeps_files_open = True
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        super().__init__()
+        self.todo_db = path or XDG_DATA / "todo.db"
+        self._records: Optional[Records] = None
+        self._data_version = -1
+        self.connection = sqlite3.connect(self.todo_db, check_same_thread=False)
+        self.setup_schema()
+
+    @property
+    def files(self) -> List[Path]:
+        return [self.todo_db]
+
+    def setup_schema(self) -> None:
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+            # Version 1 had no sort modes
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == 1:
+                self.connection.execute("ALTER TABLE workspaces ADD COLUMN sort")
+
+            # Versions 1 and 2 kept the positions of the items instead of
+            # the siblings they come after
+            if 0 < version < 3:
+                for table, _ in TABLES.values():
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN after")
+                    self.connection.execute(
+                        f"UPDATE {table} SET after = ("
+                        f"SELECT uuid FROM {table} AS prev "
+                        f"WHERE prev.parent IS {table}.parent "
+                        f"AND prev.position < {table}.position "
+                        "ORDER BY prev.position DESC LIMIT 1)"
+                    )
+
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @property
+    def data_version(self) -> int:
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def has_changed(self) -> bool:
+        # Only bumped by commits from other connections
+        return self.data_version != self._data_version
+
+    def is_seeded(self) -> bool:
+        """
+        Whether the database was ever saved to, it is only filled from
+        `todo.yaml` before that
+        """
+
+        query = "SELECT 1 FROM meta WHERE key = 'seeded'"
+        return bool(self.connection.execute(query).fetchone())
+
+    def mark_seeded(self) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('seeded', 1)")
+
+    def is_empty(self) -> bool:
+        for table, _ in TABLES.values():
+            if self.connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+
+        return True
+
+    def load(self) -> Any:
+        if not self.is_seeded():
+            if self.is_empty():
+                self._data_version = self.data_version
+                return self.migrate()
+
+            # Filled before saves were marked
+            with self.connection:
+                self.mark_seeded()
+
+        self._data_version = self.data_version
+
+        records: Records = {}
+        for kind, (table, fields) in TABLES.items():
+            columns = ", ".join(["uuid", "parent", "after", *fields])
+            for row in self.connection.execute(f"SELECT {columns} FROM {table}"):
+                uuid, parent, after, *values = row
+                records[uuid] = {"kind": kind, "parent": parent, "after": after}
+                records[uuid].update(
+                    (i, j) for i, j in zip(fields.values(), values) if j is not None
+                )
+
+        self._records = records
+        return unflatten(records)
+
+    def migrate(self) -> Any:
+        """
+        Loads the data from `todo.yaml` in case the database was never saved to
+        """
+
+        from .parser import Parser
+
+        data = Parser(use_journal=False).load()
+        self.needs_commit = bool(data)
+        return data
+
+    def save(self, data: Dict) -> None:
+        records = flatten(data)
+        old = self._records or {}
+
+        with self.connection:
+            self.apply(diff(old, records), old)
+            self.mark_seeded()
+
+        self._data_version = self.data_version
+        self._records = records
+        self.needs_commit = False
+
+    def apply(self, ops: List[Operation], old: Records) -> None:
+        """
+        Runs the operations against the database
+        """
+
+        cursor = self.connection.cursor()
+        for op in ops:
+            uuid = op["uuid"]
+            if op["op"] == "add":
+                record: Dict = op["record"]
+                table, fields = TABLES[record["kind"]]
+                columns = ["uuid", "parent", "after", *fields]
+                values = [uuid, record["parent"], record["after"]]
+                values += [record.get(i) for i in fields.values()]
+                placeholders = ", ".join("?" * len(columns))
+                cursor.execute(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({placeholders})",
+                    values,
+                )
+
+            elif op["op"] == "set":
+                table, fields = TABLES[old[uuid]["kind"]]
+                columns = {j: i for i, j in fields.items()}
+                columns.update(parent="parent", after="after")
+                changed = {
+                    columns[i]: j for i, j in op["fields"].items() if i in columns
+                }
+                if not changed:
+                    continue
+
+                assignments = ", ".join(f"{i} = ?" for i in changed)
+                cursor.execute(
+                    f"UPDATE {table} SET {assignments} WHERE uuid = ?",
+                    [*changed.values(), uuid],
+                )
+
+            elif op["op"] == "del":
+                table, _ = TABLES[old[uuid]["kind"]]
+                cursor.execute(f"DELETE FROM {table} WHERE uuid = ?", [uuid])
@@ -0,0 +1,164 @@
+import appdirs
+import os
+import shutil
+import tempfile
+from os import makedirs
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from dooit.utils.conf_reader import config_man
+
+XDG_CONFIG = Path(appdirs.user_config_dir("dooit"))
+XDG_DATA = Path(appdirs.user_data_dir("dooit"))
+STORAGE = config_man.get("STORAGE")
+
+
+def fsync_dir(path: Path) -> None:
+    """
+    Flushes the directory entry so that a rename survives a crash
+    """
+
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Directories can't be opened on windows
+
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, content: bytes, backup: Optional[Path] = None) -> None:
+    """
+    Writes the file in a way that readers only ever see the old or the new data
+
+    The content goes to a temp file in the same directory which replaces
+    the original after being synced to disk.
+    Optionally the replaced file is kept as `backup`
+    """
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(content)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        if backup and path.is_file():
+            keep_copy(path, backup)
+
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    fsync_dir(path.parent)
+
+
+def keep_copy(path: Path, copy: Path) -> None:
+    """
+    Makes `copy` point to the current contents of `path`
+    """
+
+    tmp = copy.with_name(f".{copy.name}.tmp")
+    if tmp.exists():
+        os.remove(tmp)
+
+    try:
+        # A hard link costs no I/O and keeps the old inode alive after the rename
+        os.link(path, tmp)
+    except OSError:
+        shutil.copy2(path, tmp)
+
+    os.replace(tmp, copy)
+
+
+class Storage:
+    """
+    Base class for the backends which store dooit's data
+    """
+
+    # Set when the loaded data should be written back right away (eg. migrations)
+    needs_commit = False
+
+    # Backends holding their files open can't be watched for close events
+    keeps_files_open = False
+
+    def __init__(self) -> None:
+        self.check_files()
+
+    @property
+    def files(self) -> List[Path]:
+        """
+        Files that change when the data is saved
+        """
+        raise NotImplementedError
+
+    @property
+    def last_modified(self) -> float:
+        return max((os.stat(i).st_mtime for i in self.files if i.is_file()), default=0)
+
+    def has_changed(self) -> bool:
+        """
+        Checks if the stored data was changed by someone else since
+        it was last loaded or saved
+        """
+        raise NotImplementedError
+
+    def load(self) -> Any:
+        """
+        Retrieves the todos from storage
+        """
+        raise NotImplementedError
+
+    def save(self, data: Dict) -> None:
+        """
+        Saves the todos to storage
+        """
+        raise NotImplementedError
+
+    def load_todos(self, uuid: str) -> Dict[str, List]:
+        """
+        Retrieves the todos of a top-level workspace left out by `load`,
+        keyed by the uuids of the workspace and its children
+        """
+        raise NotImplementedError
+
+    def check_files(self) -> None:
+        """
+        Checks if all the files and folders are present
+        to avoid any errors
+        """
+
+        makedirs(XDG_CONFIG, exist_ok=True)
+        makedirs(XDG_DATA, exist_ok=True)
+
+        self.config_file = XDG_CONFIG / "config.py"
+
+        if not Path.is_file(self.config_file):
+            with open(self.config_file, "w"):
+                pass
+
+
+def get_storage(kind: str = STORAGE) -> Storage:
+    """
+    Returns the storage backend configured by the user
+    """
+
+    if kind == "sqlite":
+        from .sqlite_storage import SqliteStorage
+
+        return SqliteStorage()
+
+    if kind == "sharded":
+        from .sharded_storage import ShardedStorage
+
+        return ShardedStorage()
+
+    if kind == "yaml":
+        from .parser import Parser
+
+        return Parser()
+
+    raise ValueError(f"Unknown storage backend: {kind}")
@@ -0,0 +1,127 @@
+from itertools import count
+from sys import intern
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+def get_tags(text: str) -> Tuple[str, ...]:
+    """
+    Returns the words of the text starting with `@`
+
+    The same few tags come up across many todos, they are interned
+    so that all of them share one string
+    """
+
+    if "@" not in text:
+        return ()
+
+    return tuple(intern(i) for i in text.split() if i[0] == "@")
+
+
+class TagIndex:
+    """
+    Uuids of the todos by the tags in their descriptions
+
+    Only todos with tags are kept, in the order they were first indexed
+    """
+
+    def __init__(self, todos: Iterable[Any] = ()) -> None:
+        self.uuids: Dict[str, Set[str]] = {}
+        self.models: Dict[str, Any] = {}
+        self.tags: Dict[str, FrozenSet[str]] = {}
+        self.order: Dict[str, int] = {}
+        self._counter = count()
+        self._counts: Optional[Dict[str, int]] = None
+
+        for i in todos:
+            if i.tags:
+                self.add(i)
+
+    def add(self, todo: Any) -> None:
+        """
+        Indexes the tags of the todo, again if they changed
+        """
+
+        uuid = todo.uuid
+        old = self.tags.get(uuid, frozenset())
+        new = frozenset(todo.tags)
+        if old == new:
+            if new:
+                self.models[uuid] = todo
+            return
+
+        for i in old - new:
+            self._unpost(i, uuid)
+        for i in new - old:
+            self.uuids.setdefault(i, set()).add(uuid)
+
+        if new:
+            self.tags[uuid] = new
+            self.models[uuid] = todo
+            self.order.setdefault(uuid, next(self._counter))
+        else:
+            del self.tags[uuid]
+            del self.models[uuid]
+            del self.order[uuid]
+
+        self._counts = None
+
+    def discard(self, todo: Any) -> None:
+        uuid = todo.uuid
+        if (tags := self.tags.pop(uuid, None)) is None:
+            return
+
+        del self.models[uuid]
+        del self.order[uuid]
+        for i in tags:
+            self._unpost(i, uuid)
+
+        self._counts = None
+
+    def _unpost(self, tag: str, uuid: str) -> None:
+        if uuids := self.uuids.get(tag):
+            uuids.discard(uuid)
+            if not uuids:
+                del self.uuids[tag]
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of todos for every tag, sorted by tag
+        """
+
+        if self._counts is None:
+            self._counts = {i: len(self.uuids[i]) for i in sorted(self.uuids)}
+
+        return self._counts
+
+    def get(self, tag: str) -> List[Any]:
+        """
+        Returns the todos with the tag
+        """
+
+        return self._get_models(self.uuids.get(tag, set()))
+
+    def find(self, words: List[str]) -> List[Any]:
+        """
+        Returns the todos which, for every word, have a tag starting with it
+        """
+
+        uuids: Optional[Set[str]] = None
+        for word in words:
+            prefix = "@" + word.lstrip("@")
+            matches = set().union(
+                *(j for i, j in self.uuids.items() if i.startswith(prefix))
+            )
+            uuids = matches if uuids is None else uuids & matches
+
+        if uuids is None:
+            return list(self.models.values())
+
+        return self._get_models(uuids)
+
+    def _get_models(self, uuids: Set[str]) -> List[Any]:
+        """
+        The todos of the uuids, in the order they were first indexed
+        """
+
+        return [self.models[i] for i in sorted(uuids, key=self.order.__getitem__)]
@@ -0,0 +1,82 @@
+import heapq
+from itertools import count
+from math import inf
+from time import time
+from typing import Any, Callable, List, Optional, Tuple
+from weakref import ref
+
+
+class Transitions:
+    """
+    Min-heap of the moments at which cached values go out of date,
+    eg. when a todo becomes overdue once its due date passes
+
+    Entries are registered along with their owner, `pop_due` returns the
+    owners whose moment has come. An owner registering again replaces its
+    previous entry, which is then skipped when it reaches the top, so owners
+    only register when their moment changes
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._counter = count()
+
+        # Called when the earliest moment moves closer
+        self.on_reschedule: Optional[Callable[[], None]] = None
+
+    @property
+    def next_time(self) -> Optional[float]:
+        """
+        Timestamp of the earliest registered moment, if any
+        """
+
+        self._drop_stale()
+        if self._heap:
+            return self._heap[0][0]
+
+    def push(self, when: float, owner: Any) -> None:
+        """
+        Registers the moment at which `owner` goes out of date,
+        owners keep it as `expires` so that replaced entries can be told apart
+        """
+
+        if when == inf:
+            return
+
+        earliest = self._heap[0][0] if self._heap else inf
+        heapq.heappush(self._heap, (when, next(self._counter), ref(owner)))
+
+        if when < earliest and self.on_reschedule:
+            self.on_reschedule()
+
+    def pop_due(self, now: Optional[float] = None) -> List[Any]:
+        """
+        Removes and returns the owners whose moment has passed,
+        their `expires` is reset so that they register again on refresh
+        """
+
+        now = time() if now is None else now
+        owners = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, owner_ref = heapq.heappop(self._heap)
+            owner = owner_ref()
+            if owner is not None and owner.expires == when:
+                owner.expires = inf
+                owners.append(owner)
+
+        return owners
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            when, _, owner_ref = self._heap[0]
+            owner = owner_ref()
+            if owner is not None and owner.expires == when:
+                return
+
+            heapq.heappop(self._heap)
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+
+transitions = Transitions()
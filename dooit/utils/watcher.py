@@ -1,8 +1,17 @@
+import asyncio
+import ctypes
+import ctypes.util
 import os
-import appdirs
+import struct
+import sys
+from pathlib import Path
+from typing import Callable, List, Optional
 
-DIR = appdirs.user_data_dir("dooit")
-filename = os.path.join(DIR, "todo.yaml")
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
 
 
 class Watcher:
@@ -10,19 +19,108 @@ class Watcher:
     Watcher class for detecting todo data file changes
     """
 
-    def __init__(self):
+    def __init__(self, files: List[Path]):
         self._cached_stamp = -1
-        self.filename = filename
+        self.files = files
+
+    def get_stamp(self) -> float:
+        return max(
+            (os.stat(i).st_mtime for i in self.files if os.path.isfile(i)), default=0
+        )
 
     def has_modified(self) -> bool:
         """
         Checks if the file has modified since last cached time
         """
 
-        stamp = os.stat(self.filename).st_mtime
+        stamp = self.get_stamp()
         if abs(stamp - self._cached_stamp) >= 10**-6:
             res = self._cached_stamp != -1
             self._cached_stamp = stamp
             return res
 
         return False
+
+
+class InotifyWatcher:
+    """
+    Linux only watcher which gets woken up by the kernel when the data files
+    are written, instead of checking them periodically
+    """
+
+    def __init__(self, files: List[Path]):
+        self.files = files
+        self.names = {i.name for i in files}
+        self._fd: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def get_libc() -> Optional[ctypes.CDLL]:
+        if not sys.platform.startswith("linux"):
+            return
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        except OSError:
+            return
+
+        if hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch"):
+            return libc
+
+    def start(self, callback: Callable[[], None]) -> bool:
+        """
+        Starts watching on the running loop, returns False if inotify is unavailable
+        """
+
+        libc = self.get_libc()
+        if not libc:
+            return False
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+
+        # Watching the directory since saves replace the files with new ones
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        for directory in {i.parent for i in self.files}:
+            if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+                os.close(fd)
+                return False
+
+        self._fd = fd
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(fd, self._read_events, callback)
+        return True
+
+    def stop(self) -> None:
+        if self._fd is None:
+            return
+
+        if self._loop:
+            self._loop.remove_reader(self._fd)
+
+        os.close(self._fd)
+        self._fd = None
+
+    def _read_events(self, callback: Callable[[], None]) -> None:
+        if self._fd is None:
+            return
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        changed = False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if os.fsdecode(name) in self.names:
+                changed = True
+
+        if changed:
+            callback()
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Keep dooit away from the real config and data, before anything of it is imported
+_home = tempfile.mkdtemp(prefix="dooit-tests-")
+os.environ["XDG_CONFIG_HOME"] = os.path.join(_home, "config")
+os.environ["XDG_DATA_HOME"] = os.path.join(_home, "data")
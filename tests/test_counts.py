@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from dooit.api.manager import Manager
+
+
+def test_overdue_is_counted_on_load():
+    m = Manager()
+    workspace = m.add_workspace()
+    workspace.edit("description", "work")
+
+    past = datetime.now() - timedelta(days=2)
+    future = datetime.now() + timedelta(days=2)
+    for description, due in [("late", past), ("parent", past), ("later", future)]:
+        todo = workspace.add_todo(index=len(workspace.todos))
+        todo.edit("description", description)
+        todo._due._value = due
+
+    child = workspace.todos[1].add_child("todo")
+    child.edit("description", "late child")
+    child._due._value = past
+
+    data = m._get_commit_data()
+
+    m = Manager()
+    m.setup(data)
+    workspace = m.workspaces[0]
+    assert workspace.counts.overdue == 2
+    assert workspace.todos[1].counts.overdue == 1
@@ -0,0 +1,40 @@
+from dooit.utils.journal import apply, diff, flatten, unflatten
+from dooit.utils.schema import DESCRIPTION, TODOS, UUID, wrap
+
+
+def make_data(todos):
+    return wrap(
+        [
+            {
+                UUID: "w",
+                DESCRIPTION: "work",
+                TODOS: [{UUID: i, DESCRIPTION: i} for i in todos],
+            }
+        ]
+    )
+
+
+def test_inserting_at_the_top_touches_only_the_neighbour():
+    todos = [f"t{i}" for i in range(100)]
+    old, new = flatten(make_data(todos)), flatten(make_data(["new", *todos]))
+
+    ops = diff(old, new)
+    assert sorted(i["op"] for i in ops) == ["add", "set"]
+    assert unflatten(apply(old, ops)) == make_data(["new", *todos])
+
+
+def test_moving_and_removing_round_trip():
+    old = flatten(make_data(["a", "b", "c", "d"]))
+    expected = make_data(["c", "a", "d"])
+
+    ops = diff(old, flatten(expected))
+    assert len(ops) <= 4
+    assert unflatten(apply(old, ops)) == expected
+
+
+def test_broken_order_keeps_every_item():
+    records = flatten(make_data(["a", "b", "c"]))
+    records["b"]["after"] = "missing"
+
+    todos = unflatten(records)["workspaces"][0][TODOS]
+    assert sorted(i[UUID] for i in todos) == ["a", "b", "c"]
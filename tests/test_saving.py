@@ -0,0 +1,50 @@
+import importlib
+import logging
+import threading
+from dooit.api.manager import Manager
+from dooit.utils.scheduler import SaveScheduler
+
+manager_module = importlib.import_module("dooit.api.manager")
+
+
+class SlowStorage:
+    def __init__(self) -> None:
+        self.saved = []
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def save(self, data) -> None:
+        self.writing.set()
+        self.release.wait(5)
+        self.saved.append(data)
+
+
+def test_commit_during_save_is_written_afterwards(monkeypatch):
+    storage = SlowStorage()
+    monkeypatch.setattr(manager_module, "storage", storage)
+
+    m = Manager()
+    m.add_workspace().edit("description", "first")
+    worker = threading.Thread(target=m.save, args=(m._get_commit_data(),))
+    worker.start()
+    assert storage.writing.wait(5)
+    assert m.is_locked()
+
+    m.workspaces[0].edit("description", "second")
+    m.commit()
+
+    storage.release.set()
+    worker.join(5)
+    assert not m.is_locked()
+    assert [i["workspaces"][0]["d"] for i in storage.saved] == ["first", "second"]
+
+
+def test_flush_logs_failures(caplog):
+    def save(_) -> None:
+        raise OSError("disk full")
+
+    saver = SaveScheduler(dict, save)
+    with caplog.at_level(logging.ERROR):
+        saver.flush()
+
+    assert "disk full" in caplog.text
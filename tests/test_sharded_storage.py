@@ -0,0 +1,47 @@
+import importlib
+import pytest
+from dooit.api.manager import Manager
+from dooit.utils.sharded_storage import ShardedStorage
+
+# `dooit.api.manager` is shadowed by the manager instance
+manager_module = importlib.import_module("dooit.api.manager")
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    def use_storage() -> ShardedStorage:
+        storage = ShardedStorage(tmp_path)
+        monkeypatch.setattr(manager_module, "storage", storage)
+        return storage
+
+    return use_storage
+
+
+def test_todos_added_under_deferred_workspace_are_saved(shards):
+    shards()
+    m = Manager()
+    workspace = m.add_workspace()
+    workspace.edit("description", "home")
+    workspace.add_todo().edit("description", "existing")
+    m.commit()
+
+    shards()
+    m = Manager()
+    m.setup()
+    workspace = m.workspaces[0]
+    assert not workspace.is_loaded
+
+    child = workspace.add_workspace()
+    child.edit("description", "garden")
+    child.add_todo().edit("description", "water the plants")
+    m.commit()
+
+    shards()
+    m = Manager()
+    m.setup()
+    m.load_all()
+    workspace = m.workspaces[0]
+    assert [i.description for i in workspace.todos] == ["existing"]
+    assert [i.description for i in workspace.workspaces[0].todos] == [
+        "water the plants"
+    ]
@@ -0,0 +1,15 @@
+import os
+from dooit.utils.watcher import Watcher
+
+
+def test_poll_watcher_with_missing_files(tmp_path):
+    index = tmp_path / "index.yaml"
+    watcher = Watcher([index])
+
+    assert not watcher.has_modified()
+    assert not watcher.has_modified()
+
+    index.write_text("version: 3\n")
+    os.utime(index, (1000, 1000))
+    assert watcher.has_modified()
+    assert not watcher.has_modified()